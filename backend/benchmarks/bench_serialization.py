@@ -0,0 +1,132 @@
+"""Times rendering a large article list with each serialization path.
+
+    validated  every row through models.Article, jsonable_encoder, json.dumps (the old path)
+    orjson     rows mapped to the published fields and encoded with orjson (the current path)
+    stdlib     same mapping, encoded with the json module (used when orjson is missing)
+
+With --database, also times fetching the rows and encoding them in Python
+against building the JSON in Postgres with json_agg, using the first --rows
+articles of DATABASE_URL.
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 10000] [--rounds 10] [--database]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+import serialization
+from models import Article
+from queries import ARTICLE_COLUMNS
+
+
+def synthetic_rows(count):
+    day = datetime.date(2025, 11, 21)
+    return [
+        {
+            "id": i,
+            "title": f"Les bases de données vectorielles, partie {i}",
+            "url": f"https://medium.com/@author{i % 300}/post-{i:x}",
+            "author": f"Author {i % 300}",
+            "publication_date": day - datetime.timedelta(days=i % 400),
+            "image_url": f"https://miro.medium.com/v2/resize:fit:1400/{i:x}.png" if i % 5 else None,
+            "summary": "Un résumé en français de l'article, d'une longueur réaliste pour une carte. " * 3,
+            "tags": ["AI", "Data", f"Tag{i % 60}"],
+            "reading_time": f"{i % 15 + 1} min read",
+        }
+        for i in range(count)
+    ]
+
+
+def render_validated(rows):
+    payload = jsonable_encoder([Article(**row) for row in rows])
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def render_stdlib(rows):
+    has_orjson = serialization.HAS_ORJSON
+    serialization.HAS_ORJSON = False
+    try:
+        return serialization.render_articles(rows)
+    finally:
+        serialization.HAS_ORJSON = has_orjson
+
+
+def best_of(rounds, func, *args):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def time_database(count, rounds):
+    import asyncpg
+    from database import DB_URL
+
+    query = f"SELECT {ARTICLE_COLUMNS} FROM articles ORDER BY publication_date DESC, id DESC LIMIT $1"
+    json_query = (
+        "SELECT coalesce(json_agg(json_build_object("
+        + ", ".join(f"'{c.strip()}', {c.strip()}" for c in ARTICLE_COLUMNS.split(","))
+        + ")), '[]') FROM (" + query + ") page"
+    )
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        fetched, in_db = [], []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            serialization.render_articles(await conn.fetch(query, count))
+            fetched.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            (await conn.fetchval(json_query, count)).encode("utf-8")
+            in_db.append(time.perf_counter() - start)
+        rows = len(await conn.fetch(query, count))
+    finally:
+        await conn.close()
+    return rows, min(fetched), min(in_db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark article list serialization")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--database", action="store_true", help="also compare fetch + encode with json_agg")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    reference = render_validated(rows)
+    print(f"{args.rows} rows, {len(reference) / 1024:.0f} KiB of JSON, best of {args.rounds} rounds")
+
+    paths = [("validated", render_validated), ("stdlib", render_stdlib)]
+    if serialization.HAS_ORJSON:
+        paths.append(("orjson", serialization.render_articles))
+    else:
+        print("orjson is not installed, skipping it.")
+
+    baseline = None
+    for name, render in paths:
+        if render(rows) != reference:
+            print(f"{name}: output differs from the validated path")
+            sys.exit(1)
+        elapsed = best_of(args.rounds, render, rows)
+        baseline = baseline or elapsed
+        print(f"{name:<10} {elapsed * 1000:8.1f} ms  {baseline / elapsed:5.1f}x")
+
+    if args.database:
+        count, fetched, in_db = asyncio.run(time_database(args.rows, args.rounds))
+        print(f"\n{count} rows from the database")
+        print(f"{'fetch+encode':<14} {fetched * 1000:8.1f} ms")
+        print(f"{'json_agg':<14} {in_db * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Payload size and latency of /articles for each projection.
+
+Walks the same pages (following X-Next-Cursor) once per projection against a
+running server: the full view, the card view and an ids/titles/tags fieldset.
+Start the server with CACHE_MAX_ENTRIES=0 so every request reads the database.
+
+Usage:
+    python benchmarks/bench_views.py [--url http://localhost:8000] [--pages 50] [--limit 200] [--tag TAG]
+"""
+import time
+import argparse
+import statistics
+import urllib.parse
+import urllib.request
+
+PROJECTIONS = [
+    ("full", {}),
+    ("card", {"view": "card"}),
+    ("id,title,tags", {"fields": "id,title,tags"}),
+]
+
+
+def get(url, params):
+    start = time.perf_counter()
+    with urllib.request.urlopen(f"{url}/articles?{urllib.parse.urlencode(params)}") as response:
+        body = response.read()
+        next_cursor = response.headers.get("X-Next-Cursor")
+    return body, next_cursor, time.perf_counter() - start
+
+
+def walk(url, params, pages):
+    sizes, latencies = [], []
+    cursor = None
+    for _ in range(pages):
+        body, cursor, elapsed = get(url, {**params, **({"cursor": cursor} if cursor else {})})
+        sizes.append(len(body))
+        latencies.append(elapsed)
+        if not cursor:
+            break
+    return sizes, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare /articles projections")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--tag", help="only walk articles with this tag")
+    args = parser.parse_args()
+    url = args.url.rstrip("/")
+    base = {"limit": args.limit, **({"tag": args.tag} if args.tag else {})}
+
+    # Warm up connections and the server's statement cache
+    for _, params in PROJECTIONS:
+        get(url, {**base, **params})
+
+    print(f"{args.pages} pages of {args.limit} articles per projection")
+    print(f"{'projection':<16}{'pages':>7}{'KiB/page':>10}{'vs full':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    full_size = None
+    for name, params in PROJECTIONS:
+        sizes, latencies = walk(url, {**base, **params}, args.pages)
+        per_page = sum(sizes) / len(sizes)
+        full_size = full_size or per_page
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{name:<16}{len(sizes):>7}{per_page / 1024:>10.1f}{per_page / full_size:>8.0%}"
+              f"{statistics.median(latencies) * 1000:>9.1f}{p95 * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Concurrent load test for the read endpoints.
+
+Sends a mix of /articles (filtered and paged), /search and /filters requests
+from many concurrent clients for a fixed duration, then reports throughput,
+latency percentiles and the pool statistics of GET /stats. Pass several
+--url values to compare servers, e.g. two builds of the backend started side
+by side.
+
+Start the server with CACHE_MAX_ENTRIES=0 to measure the database path rather
+than the response cache.
+
+Usage:
+    python benchmarks/load_test.py --url http://localhost:8000 [--url ...] [--concurrency 100] [--duration 20]
+        [--endpoints articles,search,filters]
+"""
+import time
+import random
+import asyncio
+import argparse
+import aiohttp
+
+SEARCH_TERMS = ["python", "data", "ai", "postgres", "machine learning", "design", "startup", "rust"]
+LIMITS = [10, 20, 50, 100]
+
+
+async def load_samples(session, url):
+    """Real dates, tags and authors to filter on, from GET /filters."""
+    async with session.get(f"{url}/filters") as response:
+        response.raise_for_status()
+        filters = await response.json()
+    return {
+        "dates": filters["dates"][:30] or [None],
+        "tags": filters["tags"][:50] or [None],
+        "authors": [a["author"] for a in filters["authors"][:50]] or [None],
+    }
+
+
+def next_request(rng, samples, endpoints):
+    while True:
+        path, params = random_request(rng, samples)
+        if path.lstrip("/") in endpoints:
+            return path, params
+
+
+def random_request(rng, samples):
+    roll = rng.random()
+    limit = rng.choice(LIMITS)
+    if roll < 0.35:
+        return "/articles", {"limit": limit}
+    if roll < 0.55:
+        return "/articles", {"date": rng.choice(samples["dates"]), "limit": limit}
+    if roll < 0.70:
+        return "/articles", {"tag": rng.choice(samples["tags"]), "limit": limit}
+    if roll < 0.80:
+        return "/articles", {"author": rng.choice(samples["authors"]), "limit": limit}
+    if roll < 0.95:
+        return "/search", {"q": rng.choice(SEARCH_TERMS), "limit": limit}
+    return "/filters", {}
+
+
+async def client(session, url, samples, endpoints, deadline, seed, results):
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        path, params = next_request(rng, samples, endpoints)
+        params = {k: v for k, v in params.items() if v is not None}
+        start = time.perf_counter()
+        try:
+            async with session.get(f"{url}{path}", params=params) as response:
+                await response.read()
+                ok = response.status == 200
+        except aiohttp.ClientError:
+            ok = False
+        elapsed = time.perf_counter() - start
+        if ok:
+            results["latencies"].append(elapsed)
+        else:
+            results["errors"] += 1
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def run(url, concurrency, duration, endpoints):
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        samples = await load_samples(session, url)
+        results = {"latencies": [], "errors": 0}
+        started = time.monotonic()
+        deadline = started + duration
+        await asyncio.gather(*(client(session, url, samples, endpoints, deadline, seed, results) for seed in range(concurrency)))
+        elapsed = time.monotonic() - started
+        async with session.get(f"{url}/stats") as response:
+            stats = await response.json()
+
+    latencies = sorted(results["latencies"])
+    return {
+        "url": url,
+        "requests": len(latencies),
+        "errors": results["errors"],
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "pool_wait_avg": stats.get("pool", {}).get("wait_avg_ms", 0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend read endpoints")
+    parser.add_argument("--url", action="append", help="server to test (repeat to compare)")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--endpoints", default="articles,search,filters",
+                        help="comma-separated subset of the request mix")
+    args = parser.parse_args()
+    urls = args.url or ["http://localhost:8000"]
+    endpoints = set(args.endpoints.split(","))
+
+    print(f"{args.concurrency} concurrent clients, {args.duration:.0f}s per server")
+    print(f"{'server':<32}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'pool wait':>11}")
+    for url in urls:
+        r = asyncio.run(run(url.rstrip("/"), args.concurrency, args.duration, endpoints))
+        print(f"{r['url']:<32}{r['requests']:>10}{r['errors']:>8}{r['rps']:>9.0f}{r['p50']:>9.1f}"
+              f"{r['p95']:>9.1f}{r['p99']:>9.1f}{r['pool_wait_avg']:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
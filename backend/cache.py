@@ -0,0 +1,95 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from compression import compress, COMPRESS_MIN_SIZE
+
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "512"))
+# Safety bound only: entries are invalidated as soon as the data version changes
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "3600"))
+
+
+class CachedResponse:
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.headers = headers or {}
+        # Compressed copies of body by content coding, made on first use and kept with the entry
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        """(bytes, content coding or None, reused) to send to a client that negotiated `encoding`."""
+        if encoding is None or len(self.body) < COMPRESS_MIN_SIZE:
+            return self.body, None, False
+        reused = encoding in self._encoded
+        if not reused:
+            compressed = compress(self.body, encoding)
+            # None: compressing does not pay off for this body
+            self._encoded[encoding] = compressed if len(compressed) < len(self.body) else None
+        if self._encoded[encoding] is None:
+            return self.body, None, reused
+        return self._encoded[encoding], encoding, reused
+
+
+class ResponseCache:
+    """Bounded LRU of rendered responses, tagged with the data version they were built from."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key, version):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self._stats["misses"] += 1
+                return None
+            entry_version, stored_at, response = item
+            if entry_version != version:
+                del self._entries[key]
+                self._stats["invalidations"] += 1
+                self._stats["misses"] += 1
+                return None
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return response
+
+    def put(self, key, version, response):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+def make_key(route, **params):
+    """Normalized cache key: empty params dropped, order-insensitive values sorted."""
+    items = []
+    for name, value in sorted(params.items()):
+        if value is None or value == "" or value == []:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(set(value)))
+        items.append((name, value))
+    return (route, tuple(items))
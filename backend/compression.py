@@ -0,0 +1,90 @@
+import os
+import gzip
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# Bodies smaller than this are sent as is: the framing overhead outweighs the savings
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+# Cached responses are compressed once per encoding, so these can be higher than for on-the-fly compression
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", "5"))
+
+# Preferred first when the client accepts several with the same weight
+SUPPORTED_ENCODINGS = ("br", "gzip") if HAS_BROTLI else ("gzip",)
+
+
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header."""
+    weights = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def negotiate_encoding(header):
+    """Best supported content coding the client accepts, or None for identity."""
+    weights = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    # mtime=0 keeps the bytes identical across runs
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+class CompressionStats:
+    """Counters for GET /stats. Only touched from the event loop."""
+
+    def __init__(self):
+        self._stats = {
+            "responses": 0,
+            "compressed": {},
+            "compressions": 0,
+            "reused": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+        }
+
+    def record(self, encoding, body_size, sent_size, reused):
+        self._stats["responses"] += 1
+        self._stats["bytes_in"] += body_size
+        self._stats["bytes_out"] += sent_size
+        if encoding is None:
+            return
+        self._stats["compressed"][encoding] = self._stats["compressed"].get(encoding, 0) + 1
+        self._stats["reused" if reused else "compressions"] += 1
+
+    def stats(self):
+        stats = dict(self._stats, compressed=dict(self._stats["compressed"]))
+        stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+        stats["ratio"] = stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else 1.0
+        stats.update({
+            "encodings": list(SUPPORTED_ENCODINGS),
+            "min_size": COMPRESS_MIN_SIZE,
+            "gzip_level": COMPRESS_GZIP_LEVEL,
+            "brotli_quality": COMPRESS_BROTLI_QUALITY if HAS_BROTLI else None,
+        })
+        return stats
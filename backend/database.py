@@ -1,9 +1,187 @@
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import time
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+import asyncpg
+from metrics import QUERY_DURATION, QUERY_ROWS
 
 DB_URL = os.environ.get("DATABASE_URL")
 
-def get_db_connection():
-    conn = psycopg2.connect(DB_URL, cursor_factory=RealDictCursor)
-    return conn
+# Pool tuning (see GET /stats to watch wait times and size)
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "10"))
+# How long a request may wait for a free connection before failing
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+# Connections idle for longer than this are pinged before being handed out
+DB_POOL_CHECK_IDLE = float(os.environ.get("DB_POOL_CHECK_IDLE", "30"))
+# A ping slower than this counts as a dead connection (a half-open socket never answers)
+DB_POOL_PING_TIMEOUT = float(os.environ.get("DB_POOL_PING_TIMEOUT", "1"))
+# Connections idle for longer than this are closed (the pool keeps DB_POOL_MIN open)
+DB_POOL_MAX_INACTIVE = float(os.environ.get("DB_POOL_MAX_INACTIVE", "300"))
+# Prepared statements kept per connection; every backend query is prepared once and reused
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "100"))
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """asyncpg pool that waits (up to a timeout) when exhausted and keeps wait statistics."""
+
+    def __init__(self, pool, timeout, check_idle):
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self._pool = pool
+        # Only touched from the event loop, so no lock is needed
+        self._last_used = {}
+        self._stats = {
+            "acquired": 0,
+            "timeouts": 0,
+            "discarded": 0,
+            "wait_total_ms": 0.0,
+            "wait_max_ms": 0.0,
+        }
+
+    @classmethod
+    async def create(cls, dsn, minconn, maxconn, timeout, check_idle, max_inactive, statement_cache_size):
+        pool = await asyncpg.create_pool(
+            dsn,
+            min_size=minconn,
+            max_size=maxconn,
+            max_inactive_connection_lifetime=max_inactive,
+            statement_cache_size=statement_cache_size,
+        )
+        return cls(pool, timeout, check_idle)
+
+    async def _is_healthy(self, conn, deadline):
+        # asyncpg only notices closed sockets; a half-open one (failover, restart) needs a round trip
+        if conn.is_closed():
+            return False
+        last_used = self._last_used.get(conn.get_server_pid(), 0)
+        if time.monotonic() - last_used < self.check_idle:
+            return True
+        try:
+            await conn.execute("SELECT 1", timeout=max(min(DB_POOL_PING_TIMEOUT, deadline - time.monotonic()), 0.001))
+            return True
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError):
+            return False
+
+    async def _acquire(self, deadline):
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            conn = await self._pool.acquire(timeout=remaining)
+            if await self._is_healthy(conn, deadline):
+                return conn
+            self._stats["discarded"] += 1
+            self._last_used.pop(conn.get_server_pid(), None)
+            conn.terminate()
+            # The pool replaces the terminated connection
+            await self._pool.release(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        start = time.monotonic()
+        try:
+            conn = await self._acquire(start + self.timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+
+        waited_ms = (time.monotonic() - start) * 1000
+        self._stats["acquired"] += 1
+        self._stats["wait_total_ms"] += waited_ms
+        self._stats["wait_max_ms"] = max(self._stats["wait_max_ms"], waited_ms)
+        pid = conn.get_server_pid()
+        try:
+            yield conn
+        finally:
+            now = time.monotonic()
+            self._last_used[pid] = now
+            if len(self._last_used) > 2 * self._pool.get_max_size():
+                # Entries older than check_idle behave like missing ones; drop them (closed connections among them)
+                self._last_used = {p: t for p, t in self._last_used.items() if now - t < self.check_idle}
+            # asyncpg resets the connection (open transaction included) before reusing it
+            await self._pool.release(conn)
+
+    async def close(self):
+        await self._pool.close()
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["wait_avg_ms"] = stats["wait_total_ms"] / stats["acquired"] if stats["acquired"] else 0.0
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        stats.update({
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+        })
+        return stats
+
+
+_pool = None
+
+
+async def init_pool():
+    global _pool
+    if _pool is None:
+        _pool = await ConnectionPool.create(
+            DB_URL, DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_CHECK_IDLE,
+            DB_POOL_MAX_INACTIVE, DB_STATEMENT_CACHE_SIZE,
+        )
+        print(f"Database pool ready (min={DB_POOL_MIN}, max={DB_POOL_MAX})")
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+        print("Database pool closed")
+
+
+@asynccontextmanager
+async def get_db_connection():
+    pool = await init_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+def pool_stats():
+    if _pool is None:
+        return {"min_size": DB_POOL_MIN, "max_size": DB_POOL_MAX, "size": 0, "in_use": 0, "idle": 0}
+    return _pool.stats()
+
+
+@functools.lru_cache(maxsize=256)
+def numbered_placeholders(query):
+    """Rewrites the %s placeholders of the query builders as asyncpg's $1, $2, ..."""
+    parts = query.split("%s")
+    numbered = [parts[0]]
+    for index, part in enumerate(parts[1:], start=1):
+        numbered.append(f"${index}{part}")
+    return "".join(numbered)
+
+
+async def fetch(conn, query, params=(), name="query"):
+    """Rows of a query; `name` labels its timing and row count in the metrics."""
+    start = time.perf_counter()
+    rows = await conn.fetch(numbered_placeholders(query), *params)
+    QUERY_DURATION.labels(name).observe(time.perf_counter() - start)
+    QUERY_ROWS.labels(name).observe(len(rows))
+    return rows
+
+
+async def fetchrow(conn, query, params=(), name="query"):
+    start = time.perf_counter()
+    row = await conn.fetchrow(numbered_placeholders(query), *params)
+    QUERY_DURATION.labels(name).observe(time.perf_counter() - start)
+    QUERY_ROWS.labels(name).observe(0 if row is None else 1)
+    return row
@@ -0,0 +1,78 @@
+"""Prints the query plans of the backend read queries and flags sequential scans.
+
+Usage (inside the backend container):
+    python explain_queries.py              # plans as Postgres would run them
+    python explain_queries.py --force-index  # with enable_seqscan=off, to prove an index is usable
+
+On a small table Postgres legitimately prefers a seq scan; --force-index
+shows whether a matching index exists at all.
+"""
+import sys
+import asyncio
+import asyncpg
+from database import DB_URL, fetch, fetchrow
+from pagination import DEFAULT_PAGE_SIZE
+from queries import build_articles_query, build_search_query, FILTER_DATES_QUERY, FILTER_TAGS_QUERY, FILTER_AUTHORS_QUERY
+
+
+async def sample_values(conn):
+    row = await fetchrow(
+        conn,
+        "SELECT id, publication_date, author, tags[1] AS tag FROM articles "
+        "WHERE publication_date IS NOT NULL ORDER BY publication_date DESC, id DESC LIMIT 1"
+    )
+    if not row:
+        return None
+    return {"id": row[0], "date": row[1], "author": row[2], "tag": row[3]}
+
+
+def backend_queries(sample):
+    limit = DEFAULT_PAGE_SIZE + 1
+    queries = [
+        ("articles (first page)", build_articles_query(limit=limit)),
+        ("articles by date", build_articles_query(date=sample["date"], limit=limit)),
+        ("articles by author", build_articles_query(author=sample["author"], limit=limit)),
+        ("articles by tag", build_articles_query(tag=sample["tag"], limit=limit)),
+        ("articles next page", build_articles_query(cursor=(sample["date"], sample["id"]), limit=limit)),
+        ("search", build_search_query(sample["tag"], limit=limit)),
+        ("filters dates", (FILTER_DATES_QUERY, [])),
+        ("filters tags", (FILTER_TAGS_QUERY, [])),
+        ("filters authors", (FILTER_AUTHORS_QUERY, [])),
+    ]
+    return queries
+
+
+async def explain_all(force_index):
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        sample = await sample_values(conn)
+        if not sample:
+            print("The articles table is empty; nothing to explain.")
+            return
+        if force_index:
+            await conn.execute("SET enable_seqscan = off")
+
+        seq_scans = []
+        for name, (query, params) in backend_queries(sample):
+            rows = await fetch(conn, "EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+            plan = "\n".join(row[0] for row in rows)
+            print(f"=== {name} ===")
+            print(plan)
+            print()
+            if "Seq Scan on articles" in plan:
+                seq_scans.append(name)
+
+        if seq_scans:
+            print(f"Sequential scans on articles: {', '.join(seq_scans)}")
+        else:
+            print("All backend queries use index scans.")
+    finally:
+        await conn.close()
+
+
+def main():
+    asyncio.run(explain_all("--force-index" in sys.argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+
+# Browsers and proxies revalidate after this many seconds (a 304 costs one tiny query)
+HTTP_MAX_AGE = int(os.environ.get("HTTP_MAX_AGE", "0"))
+CACHE_CONTROL = f"public, max-age={HTTP_MAX_AGE}, must-revalidate"
+
+
+def make_etag(version, key, encoding=None):
+    """Strong validator: changes whenever the data version or the request itself changes.
+
+    Each content coding is a distinct representation, so it gets its own suffix.
+    """
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+    if encoding:
+        return f'"v{version}-{digest}-{encoding}"'
+    return f'"v{version}-{digest}"'
+
+
+def validator_headers(version, updated_at, key, encoding=None):
+    """Validators of the representation actually sent, compressed with `encoding` (None when sent as is)."""
+    headers = {"ETag": make_etag(version, key, encoding), "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(updated_at, usegmt=True)
+    return headers
+
+
+def etag_matches(if_none_match, etag):
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
+
+
+def is_not_modified(request_headers, etag, updated_at):
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and updated_at is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        # HTTP dates have second precision
+        return updated_at.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified_etag(request_headers, version, key, encoding, updated_at):
+    """ETag of the client's stored copy when it is still current, else None.
+
+    Checked before the body is known: a client negotiating `encoding` may hold the compressed
+    representation or the identity one (small bodies are never compressed).
+    """
+    for coding in dict.fromkeys((encoding, None)):
+        etag = make_etag(version, key, coding)
+        if is_not_modified(request_headers, etag, updated_at):
+            return etag
+    return None
@@ -1,10 +1,28 @@
-from fastapi import FastAPI, HTTPException, Query
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
-from database import get_db_connection
-from models import Article
+from typing import List, Optional, Union
+from database import get_db_connection, init_pool, close_pool, pool_stats, fetch, fetchrow, PoolTimeout
+from models import Article, ArticleCard, ArticleFields
+from pagination import DEFAULT_PAGE_SIZE, decode_cursor, decode_search_cursor, clamp_limit, split_page, split_search_page
+from queries import build_articles_query, build_search_query, parse_tags, parse_date, resolve_fields, ARTICLE_FIELDS, DATA_VERSION_QUERY, FILTER_DATES_QUERY, FILTER_TAGS_QUERY, FILTER_AUTHORS_QUERY
+from cache import ResponseCache, CachedResponse, make_key
+from serialization import render_json, render_articles
+from http_cache import validator_headers, not_modified_etag
+from compression import CompressionStats, negotiate_encoding
+from metrics import REQUEST_DURATION, CACHE_RESULTS, render_metrics
 
-app = FastAPI()
+response_cache = ResponseCache()
+compression_stats = CompressionStats()
+
+@asynccontextmanager
+async def lifespan(app):
+    await init_pool()
+    yield
+    await close_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS for frontend
 app.add_middleware(
@@ -17,70 +35,149 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Labelled by route template (/articles), not by raw path, to keep the label set small
+    route = request.scope.get("route")
+    REQUEST_DURATION.labels(request.method, route.path if route else "unmatched", response.status_code).observe(
+        time.perf_counter() - start)
+    return response
+
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Medium Article Explorer API"}
 
-@app.get("/articles", response_model=List[Article])
-def get_articles(
+@app.get("/stats")
+async def get_stats():
+    return {"pool": pool_stats(), "cache": response_cache.stats(), "compression": compression_stats.stats()}
+
+@app.get("/metrics")
+async def get_metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+def render_page(rows, next_cursor, fields=ARTICLE_FIELDS):
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    # Rows are encoded directly; the response_model only documents the schema
+    return CachedResponse(render_articles(rows, fields), headers)
+
+async def serve_cached(request, key, build):
+    """Answers a read request from HTTP validators or the response cache.
+
+    `await build(conn)` runs the actual queries on a miss and returns a CachedResponse.
+    The body is compressed (gzip or brotli, per Accept-Encoding) once per cached entry.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    try:
+        async with get_db_connection() as conn:
+            version_row = await fetchrow(conn, DATA_VERSION_QUERY, name="data_version")
+            version = version_row['version']
+            updated_at = version_row['updated_at']
+            etag = not_modified_etag(request.headers, version, key, encoding, updated_at)
+            if etag:
+                CACHE_RESULTS.labels("not_modified").inc()
+                return Response(status_code=304, headers={**validator_headers(version, updated_at, key), "ETag": etag})
+
+            cached = response_cache.get(key, version)
+            if cached is None:
+                CACHE_RESULTS.labels("miss").inc()
+                cached = await build(conn)
+                response_cache.put(key, version, cached)
+            else:
+                CACHE_RESULTS.labels("hit").inc()
+        body, content_encoding, reused = cached.encoded(encoding)
+        compression_stats.record(content_encoding, len(cached.body), len(body), reused)
+        # Bodies too small to compress keep the identity ETag, whatever the client accepts
+        headers = {**cached.headers, **validator_headers(version, updated_at, key, content_encoding)}
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+    except PoolTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/articles", response_model=List[Union[Article, ArticleCard, ArticleFields]])
+async def get_articles(
+    request: Request,
     date: Optional[str] = None,
     tag: Optional[str] = None,
-    author: Optional[str] = None
+    author: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated Article fields to return; items then follow ArticleFields"),
+    view: Optional[str] = Query(None, description="full (default) or card")
 ):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = "SELECT * FROM articles WHERE 1=1"
-    params = []
-    
-    if date:
-        query += " AND publication_date = %s"
-        params.append(date)
-        
-    if author:
-        query += " AND author = %s"
-        params.append(author)
-        
-    if tag:
-        # Split tags by comma and clean them
-        tags_list = [t.strip() for t in tag.split(',') if t.strip()]
-        if tags_list:
-            # Use && operator for 'OR' search between arrays (has elements in common)
-            query += " AND tags && %s"
-            params.append(tags_list)
-        
-    query += " ORDER BY publication_date DESC, id DESC"
-    
+    # Keyset pagination: the next page token is returned in the X-Next-Cursor header
+    limit = clamp_limit(limit)
+    decoded_cursor = None
     try:
-        cursor.execute(query, params)
-        articles = cursor.fetchall()
-        return articles
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        conn.close()
+        if cursor:
+            decoded_cursor = decode_cursor(cursor)
+        decoded_date = parse_date(date)
+        selected = resolve_fields(fields, view)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/filters")
-def get_filters():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    # Fetch one extra row to know whether there is a next page
+    query, params = build_articles_query(decoded_date, tag, author, decoded_cursor, limit + 1, selected)
+    key = make_key("articles", date=date, tag=parse_tags(tag), author=author, limit=limit, cursor=cursor,
+                   fields=None if selected == ARTICLE_FIELDS else selected)
+
+    async def build(conn):
+        return render_page(*split_page(await fetch(conn, query, params, "articles"), limit), selected)
+
+    return await serve_cached(request, key, build)
+
+@app.get("/search", response_model=List[Union[Article, ArticleCard, ArticleFields]])
+async def search_articles(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated Article fields to return; items then follow ArticleFields"),
+    view: Optional[str] = Query(None, description="full (default) or card")
+):
+    """Full-text search over titles and French summaries, most relevant first."""
+    limit = clamp_limit(limit)
+    decoded_cursor = None
     try:
+        if cursor:
+            decoded_cursor = decode_search_cursor(cursor)
+        selected = resolve_fields(fields, view)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query, params = build_search_query(q, decoded_cursor, limit + 1, selected)
+    key = make_key("search", q=" ".join(q.split()), limit=limit, cursor=cursor,
+                   fields=None if selected == ARTICLE_FIELDS else selected)
+
+    async def build(conn):
+        return render_page(*split_search_page(await fetch(conn, query, params, "search"), limit), selected)
+
+    return await serve_cached(request, key, build)
+
+@app.get("/filters")
+async def get_filters(request: Request):
+    async def build(conn):
         # Get unique dates
-        cursor.execute("SELECT DISTINCT publication_date FROM articles ORDER BY publication_date DESC")
-        dates = [row['publication_date'] for row in cursor.fetchall() if row['publication_date']]
-        
-        # Get all tags and count them (optional, but good for UI)
-        # For simplicity, just get unique tags
-        cursor.execute("SELECT DISTINCT unnest(tags) as tag FROM articles ORDER BY tag")
-        tags = [row['tag'] for row in cursor.fetchall() if row['tag']]
-        
-        return {"dates": dates, "tags": tags}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        conn.close()
+        dates = [row['publication_date'] for row in await fetch(conn, FILTER_DATES_QUERY, name="filter_dates")]
+
+        # Tags in alphabetical order, with their article counts
+        tag_rows = await fetch(conn, FILTER_TAGS_QUERY, name="filter_tags")
+        tags = [row['tag'] for row in tag_rows]
+        # Most used tags first (ties stay alphabetical)
+        tag_counts = [{"tag": row['tag'], "count": row['article_count']}
+                      for row in sorted(tag_rows, key=lambda row: -row['article_count'])]
+
+        authors = [{"author": row['author'], "count": row['article_count']}
+                   for row in await fetch(conn, FILTER_AUTHORS_QUERY, name="filter_authors")]
+
+        return CachedResponse(render_json({"dates": dates, "tags": tags, "tag_counts": tag_counts, "authors": authors}))
+
+    return await serve_cached(request, make_key("filters"), build)
@@ -0,0 +1,30 @@
+"""Prometheus metrics of the API, served on GET /metrics."""
+from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to answer a request, by route template",
+    ["method", "route", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Time spent in a database query, pool wait excluded",
+    ["query"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+QUERY_ROWS = Histogram(
+    "db_query_rows",
+    "Rows returned by a database query",
+    ["query"],
+    buckets=(0, 1, 10, 50, 100, 200, 500, 1000),
+)
+CACHE_RESULTS = Counter(
+    "response_cache_results_total",
+    "Read requests answered with a 304, from the response cache, or by querying",
+    ["result"],
+)
+
+
+def render_metrics():
+    return generate_latest(), CONTENT_TYPE_LATEST
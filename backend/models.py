@@ -12,3 +12,25 @@ class Article(BaseModel):
     summary: Optional[str] = None
     tags: List[str] = []
     reading_time: Optional[str] = None
+
+class ArticleCard(BaseModel):
+    """?view=card: what a list or tag browser needs, without the summary and reading time."""
+    id: int
+    title: str
+    url: str
+    author: Optional[str] = None
+    publication_date: Optional[date] = None
+    image_url: Optional[str] = None
+    tags: List[str] = []
+
+class ArticleFields(BaseModel):
+    """?fields=a,b: only the requested Article fields are present, so none is required."""
+    id: Optional[int] = None
+    title: Optional[str] = None
+    url: Optional[str] = None
+    author: Optional[str] = None
+    publication_date: Optional[date] = None
+    image_url: Optional[str] = None
+    summary: Optional[str] = None
+    tags: Optional[List[str]] = None
+    reading_time: Optional[str] = None
@@ -0,0 +1,89 @@
+import base64
+import datetime
+import json
+
+# Page size used when the client does not pass ?limit=, and the hard cap on it
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _encode(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(token):
+    padded = token + "=" * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(publication_date, article_id):
+    """Opaque token pointing just after the given row in (publication_date DESC, id DESC) order."""
+    if isinstance(publication_date, (datetime.date, datetime.datetime)):
+        publication_date = publication_date.isoformat()
+    return _encode([publication_date, article_id])
+
+
+def decode_cursor(token):
+    """Returns (publication_date or None, id). Raises ValueError on a malformed token."""
+    try:
+        publication_date, article_id = _decode(token)
+        if publication_date is not None:
+            publication_date = datetime.date.fromisoformat(publication_date)
+        if not isinstance(article_id, int):
+            raise ValueError("cursor id must be an integer")
+        return publication_date, article_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def encode_search_cursor(rank, article_id):
+    """Token pointing just after the given row in (rank DESC, id DESC) order."""
+    return _encode([rank, article_id])
+
+
+def decode_search_cursor(token):
+    """Returns (rank, id). Raises ValueError on a malformed token."""
+    try:
+        rank, article_id = _decode(token)
+        if not isinstance(rank, (int, float)) or not isinstance(article_id, int):
+            raise ValueError("cursor must hold a rank and an integer id")
+        return float(rank), article_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def keyset_condition(cursor):
+    """SQL condition (and params) selecting rows that come after `cursor`.
+
+    Postgres sorts NULL dates first in DESC order, so a cursor sitting on a
+    NULL-dated row continues with the remaining NULL rows, then every dated row.
+    """
+    publication_date, article_id = cursor
+    if publication_date is None:
+        return "((publication_date IS NULL AND id < %s) OR publication_date IS NOT NULL)", [article_id]
+    return "(publication_date, id) < (%s, %s)", [publication_date, article_id]
+
+
+def clamp_limit(limit):
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def split_page(rows, limit):
+    """Rows are fetched with LIMIT limit + 1; returns (page, next_cursor or None)."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last["publication_date"], last["id"])
+
+
+def split_search_page(rows, limit):
+    """Same as split_page for rows ordered by (rank DESC, id DESC)."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_search_cursor(last["rank"], last["id"])
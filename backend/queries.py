@@ -0,0 +1,126 @@
+import datetime
+from pagination import keyset_condition
+
+# Same names and order as models.Article, the published schema
+ARTICLE_FIELDS = ["id", "title", "url", "author", "publication_date", "image_url", "summary", "tags", "reading_time"]
+ARTICLE_COLUMNS = ", ".join(ARTICLE_FIELDS)
+
+# Named projections for ?view=; "card" (models.ArticleCard) leaves out the summary and reading time
+VIEWS = {
+    "full": ARTICLE_FIELDS,
+    "card": ["id", "title", "url", "author", "publication_date", "image_url", "tags"],
+}
+
+# Always read, even when not requested, so the next page cursor can be built
+KEYSET_FIELDS = ("id", "publication_date")
+
+# Bumped by the updater whenever it applies a file (dbupdater/migrations/003_data_version.sql)
+DATA_VERSION_QUERY = "SELECT version, updated_at FROM data_version"
+
+# Facet tables are maintained by triggers on articles (dbupdater/migrations/002_facets.sql)
+FILTER_DATES_QUERY = "SELECT publication_date FROM facet_dates ORDER BY publication_date DESC"
+FILTER_TAGS_QUERY = "SELECT tag, article_count FROM facet_tags ORDER BY tag"
+FILTER_AUTHORS_QUERY = "SELECT author, article_count FROM facet_authors ORDER BY article_count DESC, author"
+
+
+def parse_tags(tag):
+    # Split tags by comma and clean them
+    if not tag:
+        return []
+    return [t.strip() for t in tag.split(',') if t.strip()]
+
+
+def resolve_fields(fields=None, view=None):
+    """Article fields to return, in schema order, from ?fields=a,b or ?view=. Raises ValueError."""
+    if fields and view:
+        raise ValueError("Pass either fields or view, not both")
+    if fields:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = requested - set(ARTICLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; available: {', '.join(ARTICLE_FIELDS)}")
+        if not requested:
+            raise ValueError("No fields requested")
+        return [f for f in ARTICLE_FIELDS if f in requested]
+    view = view or "full"
+    if view not in VIEWS:
+        raise ValueError(f"Unknown view: {view!r}; available: {', '.join(VIEWS)}")
+    return VIEWS[view]
+
+
+def select_columns(fields=None):
+    """Column list reading only the requested fields (plus the keyset columns)."""
+    if not fields:
+        return ARTICLE_COLUMNS
+    return ", ".join(f for f in ARTICLE_FIELDS if f in fields or f in KEYSET_FIELDS)
+
+
+def parse_date(value):
+    """YYYY-MM-DD query parameter as a date (asyncpg binds dates, not strings). Raises ValueError."""
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r}, expected YYYY-MM-DD")
+
+
+def build_articles_query(date=None, tag=None, author=None, cursor=None, limit=None, fields=None):
+    """Returns (query, params) for GET /articles. `date` is a datetime.date (see parse_date),
+    `cursor` a decoded (date, id) tuple, `fields` the fields to read (all by default)."""
+    query = f"SELECT {select_columns(fields)} FROM articles WHERE 1=1"
+    params = []
+
+    if date:
+        query += " AND publication_date = %s"
+        params.append(date)
+
+    if author:
+        query += " AND author = %s"
+        params.append(author)
+
+    tags_list = parse_tags(tag)
+    if tags_list:
+        # Use && operator for 'OR' search between arrays (has elements in common)
+        query += " AND tags && %s"
+        params.append(tags_list)
+
+    if cursor:
+        condition, cursor_params = keyset_condition(cursor)
+        query += f" AND {condition}"
+        params.extend(cursor_params)
+
+    query += " ORDER BY publication_date DESC, id DESC"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+
+def build_search_query(q, cursor=None, limit=None, fields=None):
+    """Returns (query, params) for GET /search, ranked by relevance.
+
+    The text is parsed with both the English (titles) and French (summaries)
+    configurations and either may match, using the GIN index on search_vector.
+    `cursor` is a decoded (rank, id) tuple, `fields` as for build_articles_query.
+    """
+    # Rank as double precision so the value round-trips exactly through the cursor
+    query = (
+        "SELECT * FROM ("
+        f"SELECT {select_columns(fields)}, ts_rank(search_vector, query)::double precision AS rank "
+        "FROM articles, "
+        "(SELECT websearch_to_tsquery('english', %s) || websearch_to_tsquery('french', %s) AS query) q "
+        "WHERE search_vector @@ query"
+        ") ranked WHERE 1=1"
+    )
+    params = [q, q]
+
+    if cursor:
+        query += " AND (rank, id) < (%s, %s)"
+        params.extend(cursor)
+
+    query += " ORDER BY rank DESC, id DESC"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
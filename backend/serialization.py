@@ -0,0 +1,41 @@
+"""JSON rendering of API responses.
+
+Article rows come straight from Postgres with their final types (int, str,
+date, text[]), so they are not validated through the Article model again:
+each row is mapped to the published fields and encoded with orjson. Without
+orjson, the standard json module produces the same bytes, only more slowly.
+"""
+import json
+import datetime
+from queries import ARTICLE_FIELDS
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def render_json(payload):
+    """Compact UTF-8 JSON, as FastAPI's JSONResponse would encode it."""
+    if HAS_ORJSON:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def article_payload(row, fields=ARTICLE_FIELDS):
+    """The requested Article fields of a row (extra columns such as the search rank are left out)."""
+    article = {field: row[field] for field in fields}
+    if article.get("tags", []) is None:
+        article["tags"] = []
+    return article
+
+
+def render_articles(rows, fields=ARTICLE_FIELDS):
+    return render_json([article_payload(row, fields) for row in rows])
@@ -0,0 +1,94 @@
+import os
+import re
+import sys
+import psycopg2
+
+DB_URL = os.environ.get("DATABASE_URL")
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Serializes concurrent runs (e.g. two updater containers starting together)
+MIGRATION_LOCK_ID = 727001
+
+MIGRATION_PATTERN = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+
+def list_migrations():
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_PATTERN.match(filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations, key=lambda m: int(m[0]))
+
+
+def apply_migrations(conn):
+    """Applies pending migrations in version order, each in its own transaction."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+    cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+        conn.commit()
+
+        count = 0
+        for version, name, path in list_migrations():
+            if version in applied:
+                continue
+            print(f"Applying migration {version}_{name}...")
+            with open(path, "r") as f:
+                migration_sql = f.read()
+            try:
+                cursor.execute(migration_sql)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name),
+                )
+                conn.commit()
+                count += 1
+            except Exception:
+                conn.rollback()
+                raise
+        if count:
+            print(f"Applied {count} migration(s).")
+        return count
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        cursor.close()
+
+
+def show_status(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass('schema_migrations')")
+    applied = {}
+    if cursor.fetchone()[0]:
+        cursor.execute("SELECT version, applied_at FROM schema_migrations")
+        applied = dict(cursor.fetchall())
+    for version, name, _ in list_migrations():
+        state = f"applied {applied[version]}" if version in applied else "pending"
+        print(f"{version}_{name}: {state}")
+    cursor.close()
+
+
+def main():
+    conn = psycopg2.connect(DB_URL)
+    try:
+        if len(sys.argv) > 1 and sys.argv[1] == "status":
+            show_status(conn)
+        else:
+            apply_migrations(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
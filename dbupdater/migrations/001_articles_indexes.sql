@@ -0,0 +1,12 @@
+-- Indexes backing the backend read queries (GET /articles, GET /filters).
+
+-- tags && ARRAY[...] (tag search)
+CREATE INDEX IF NOT EXISTS idx_articles_tags ON articles USING GIN (tags);
+
+-- ORDER BY publication_date DESC, id DESC with keyset pagination, and date = ...
+CREATE INDEX IF NOT EXISTS idx_articles_pubdate_id ON articles (publication_date DESC, id DESC);
+
+-- author = ...
+CREATE INDEX IF NOT EXISTS idx_articles_author ON articles (author);
+
+ANALYZE articles;
@@ -0,0 +1,96 @@
+-- Precomputed facets for GET /filters, kept in sync with articles by triggers
+-- so the backend never has to scan articles to list dates, tags or authors.
+
+CREATE TABLE IF NOT EXISTS facet_dates (
+    publication_date DATE PRIMARY KEY,
+    article_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS facet_tags (
+    tag TEXT PRIMARY KEY,
+    article_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS facet_authors (
+    author TEXT PRIMARY KEY,
+    article_count INTEGER NOT NULL
+);
+
+-- Adds `delta` (+1 / -1) to the facets of one article, dropping entries that reach zero.
+CREATE OR REPLACE FUNCTION articles_facets_apply(p_date DATE, p_author TEXT, p_tags TEXT[], delta INTEGER)
+RETURNS void AS $$
+BEGIN
+    IF p_date IS NOT NULL THEN
+        INSERT INTO facet_dates (publication_date, article_count) VALUES (p_date, delta)
+        ON CONFLICT (publication_date) DO UPDATE SET article_count = facet_dates.article_count + EXCLUDED.article_count;
+        DELETE FROM facet_dates WHERE publication_date = p_date AND article_count <= 0;
+    END IF;
+
+    IF p_author IS NOT NULL THEN
+        INSERT INTO facet_authors (author, article_count) VALUES (p_author, delta)
+        ON CONFLICT (author) DO UPDATE SET article_count = facet_authors.article_count + EXCLUDED.article_count;
+        DELETE FROM facet_authors WHERE author = p_author AND article_count <= 0;
+    END IF;
+
+    IF p_tags IS NOT NULL THEN
+        INSERT INTO facet_tags (tag, article_count)
+        SELECT DISTINCT t, delta FROM unnest(p_tags) AS t WHERE t IS NOT NULL AND t <> ''
+        ON CONFLICT (tag) DO UPDATE SET article_count = facet_tags.article_count + EXCLUDED.article_count;
+        DELETE FROM facet_tags WHERE tag = ANY(p_tags) AND article_count <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION articles_facets_trigger()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM articles_facets_apply(NEW.publication_date, NEW.author, NEW.tags, 1);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM articles_facets_apply(OLD.publication_date, OLD.author, OLD.tags, -1);
+    ELSIF (OLD.publication_date, OLD.author, OLD.tags) IS DISTINCT FROM (NEW.publication_date, NEW.author, NEW.tags) THEN
+        PERFORM articles_facets_apply(OLD.publication_date, OLD.author, OLD.tags, -1);
+        PERFORM articles_facets_apply(NEW.publication_date, NEW.author, NEW.tags, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION articles_facets_truncate()
+RETURNS trigger AS $$
+BEGIN
+    TRUNCATE facet_dates, facet_tags, facet_authors;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS articles_facets ON articles;
+CREATE TRIGGER articles_facets
+    AFTER INSERT OR UPDATE OR DELETE ON articles
+    FOR EACH ROW EXECUTE FUNCTION articles_facets_trigger();
+
+DROP TRIGGER IF EXISTS articles_facets_truncate ON articles;
+CREATE TRIGGER articles_facets_truncate
+    AFTER TRUNCATE ON articles
+    FOR EACH STATEMENT EXECUTE FUNCTION articles_facets_truncate();
+
+-- Backfill from the existing rows; block writers so nothing slips in between.
+LOCK TABLE articles IN SHARE ROW EXCLUSIVE MODE;
+
+TRUNCATE facet_dates, facet_tags, facet_authors;
+
+INSERT INTO facet_dates (publication_date, article_count)
+SELECT publication_date, count(*) FROM articles
+WHERE publication_date IS NOT NULL
+GROUP BY publication_date;
+
+INSERT INTO facet_authors (author, article_count)
+SELECT author, count(*) FROM articles
+WHERE author IS NOT NULL
+GROUP BY author;
+
+INSERT INTO facet_tags (tag, article_count)
+SELECT t, count(DISTINCT a.id)
+FROM articles a, unnest(a.tags) AS t
+WHERE t IS NOT NULL AND t <> ''
+GROUP BY t;
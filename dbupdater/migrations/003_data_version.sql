@@ -0,0 +1,11 @@
+-- Single-row change counter. The updater bumps it in the same transaction as
+-- every update file it applies; the backend compares it to invalidate cached
+-- responses precisely.
+
+CREATE TABLE IF NOT EXISTS data_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+INSERT INTO data_version (id, version) VALUES (TRUE, 1) ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,11 @@
+-- Full-text search over titles (English) and French summaries for GET /search.
+-- A stored generated column is recomputed by Postgres on every INSERT/UPDATE,
+-- so rows written by the generated update files stay searchable with no extra SQL.
+
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('french', coalesce(summary, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_articles_search ON articles USING GIN (search_vector);
@@ -0,0 +1,96 @@
+-- Maintain the facets once per statement instead of once per row. A bulk load
+-- (COPY + merge, or deleting a whole day) now applies one summed delta per
+-- date / author / tag, instead of rewriting the same few facet rows for every
+-- article.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'articles_facet_change') THEN
+        CREATE TYPE articles_facet_change AS (
+            id INTEGER,
+            publication_date DATE,
+            author TEXT,
+            tags TEXT[],
+            delta INTEGER
+        );
+    END IF;
+END
+$$;
+
+-- Adds the summed deltas of a set of row changes to the facets, dropping entries that reach zero.
+CREATE OR REPLACE FUNCTION articles_facets_apply_changes(changes articles_facet_change[])
+RETURNS void AS $$
+BEGIN
+    INSERT INTO facet_dates (publication_date, article_count)
+    SELECT c.publication_date, sum(c.delta) FROM unnest(changes) AS c
+    WHERE c.publication_date IS NOT NULL
+    GROUP BY c.publication_date HAVING sum(c.delta) <> 0
+    ON CONFLICT (publication_date) DO UPDATE SET article_count = facet_dates.article_count + EXCLUDED.article_count;
+    DELETE FROM facet_dates WHERE article_count <= 0
+        AND publication_date IN (SELECT c.publication_date FROM unnest(changes) AS c);
+
+    INSERT INTO facet_authors (author, article_count)
+    SELECT c.author, sum(c.delta) FROM unnest(changes) AS c
+    WHERE c.author IS NOT NULL
+    GROUP BY c.author HAVING sum(c.delta) <> 0
+    ON CONFLICT (author) DO UPDATE SET article_count = facet_authors.article_count + EXCLUDED.article_count;
+    DELETE FROM facet_authors WHERE article_count <= 0
+        AND author IN (SELECT c.author FROM unnest(changes) AS c);
+
+    -- An article counts once per distinct tag, as in the backfill
+    INSERT INTO facet_tags (tag, article_count)
+    SELECT per_article.tag, sum(per_article.delta)
+    FROM (
+        SELECT DISTINCT c.id, c.delta, t AS tag
+        FROM unnest(changes) AS c, unnest(c.tags) AS t
+        WHERE t IS NOT NULL AND t <> ''
+    ) AS per_article
+    GROUP BY per_article.tag HAVING sum(per_article.delta) <> 0
+    ON CONFLICT (tag) DO UPDATE SET article_count = facet_tags.article_count + EXCLUDED.article_count;
+    DELETE FROM facet_tags WHERE article_count <= 0
+        AND tag IN (SELECT t FROM unnest(changes) AS c, unnest(c.tags) AS t);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION articles_facets_statement()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM articles_facets_apply_changes(ARRAY(
+            SELECT (n.id, n.publication_date, n.author, n.tags, 1)::articles_facet_change FROM new_rows AS n));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM articles_facets_apply_changes(ARRAY(
+            SELECT (o.id, o.publication_date, o.author, o.tags, -1)::articles_facet_change FROM old_rows AS o));
+    ELSE
+        -- Unchanged rows cancel out in the sums
+        PERFORM articles_facets_apply_changes(ARRAY(
+            SELECT (o.id, o.publication_date, o.author, o.tags, -1)::articles_facet_change FROM old_rows AS o
+            UNION ALL
+            SELECT (n.id, n.publication_date, n.author, n.tags, 1)::articles_facet_change FROM new_rows AS n));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS articles_facets ON articles;
+DROP FUNCTION IF EXISTS articles_facets_trigger();
+DROP FUNCTION IF EXISTS articles_facets_apply(DATE, TEXT, TEXT[], INTEGER);
+
+-- Transition tables need one trigger per event
+DROP TRIGGER IF EXISTS articles_facets_insert ON articles;
+CREATE TRIGGER articles_facets_insert
+    AFTER INSERT ON articles
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION articles_facets_statement();
+
+DROP TRIGGER IF EXISTS articles_facets_update ON articles;
+CREATE TRIGGER articles_facets_update
+    AFTER UPDATE ON articles
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION articles_facets_statement();
+
+DROP TRIGGER IF EXISTS articles_facets_delete ON articles;
+CREATE TRIGGER articles_facets_delete
+    AFTER DELETE ON articles
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION articles_facets_statement();
@@ -0,0 +1,98 @@
+-- Apply facet changes once per transaction, at commit. When the updater applies a
+-- batch of files in one transaction, every statement used to update the same hot
+-- facet rows (a popular tag, for instance). Those row versions cannot be pruned
+-- before commit, so each later lookup got slower. Statements now only append their
+-- summed deltas to facet_pending. A deferred trigger folds them into the facets
+-- once, when the transaction commits.
+
+CREATE UNLOGGED TABLE IF NOT EXISTS facet_pending (
+    txid BIGINT NOT NULL,
+    facet TEXT NOT NULL,
+    key TEXT NOT NULL,
+    delta INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS facet_pending_txid ON facet_pending (txid);
+
+-- One row per transaction with pending deltas; inserting it queues the flush
+CREATE UNLOGGED TABLE IF NOT EXISTS facet_flush (
+    txid BIGINT PRIMARY KEY
+);
+
+CREATE OR REPLACE FUNCTION articles_facets_apply_changes(changes articles_facet_change[])
+RETURNS void AS $$
+BEGIN
+    INSERT INTO facet_pending (txid, facet, key, delta)
+    SELECT txid_current(), 'date', c.publication_date::text, sum(c.delta) FROM unnest(changes) AS c
+    WHERE c.publication_date IS NOT NULL
+    GROUP BY c.publication_date HAVING sum(c.delta) <> 0
+    UNION ALL
+    SELECT txid_current(), 'author', c.author, sum(c.delta) FROM unnest(changes) AS c
+    WHERE c.author IS NOT NULL
+    GROUP BY c.author HAVING sum(c.delta) <> 0
+    UNION ALL
+    -- An article counts once per distinct tag, as in the backfill
+    SELECT txid_current(), 'tag', per_article.tag, sum(per_article.delta)
+    FROM (
+        SELECT DISTINCT c.id, c.delta, t AS tag
+        FROM unnest(changes) AS c, unnest(c.tags) AS t
+        WHERE t IS NOT NULL AND t <> ''
+    ) AS per_article
+    GROUP BY per_article.tag HAVING sum(per_article.delta) <> 0;
+
+    IF FOUND THEN
+        INSERT INTO facet_flush (txid) VALUES (txid_current()) ON CONFLICT (txid) DO NOTHING;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Folds this transaction's pending deltas into the facets, dropping entries that reach zero.
+CREATE OR REPLACE FUNCTION facet_flush_trigger()
+RETURNS trigger AS $$
+BEGIN
+    CREATE TEMP TABLE IF NOT EXISTS facet_flush_deltas (facet TEXT, key TEXT, delta BIGINT) ON COMMIT DROP;
+    TRUNCATE facet_flush_deltas;
+
+    WITH flushed AS (
+        DELETE FROM facet_pending WHERE txid = NEW.txid RETURNING facet, key, delta
+    )
+    INSERT INTO facet_flush_deltas
+    SELECT facet, key, sum(delta) FROM flushed GROUP BY facet, key HAVING sum(delta) <> 0;
+    DELETE FROM facet_flush WHERE txid = NEW.txid;
+
+    INSERT INTO facet_dates (publication_date, article_count)
+    SELECT key::date, delta FROM facet_flush_deltas WHERE facet = 'date'
+    ON CONFLICT (publication_date) DO UPDATE SET article_count = facet_dates.article_count + EXCLUDED.article_count;
+    DELETE FROM facet_dates WHERE article_count <= 0
+        AND publication_date IN (SELECT key::date FROM facet_flush_deltas WHERE facet = 'date');
+
+    INSERT INTO facet_authors (author, article_count)
+    SELECT key, delta FROM facet_flush_deltas WHERE facet = 'author'
+    ON CONFLICT (author) DO UPDATE SET article_count = facet_authors.article_count + EXCLUDED.article_count;
+    DELETE FROM facet_authors WHERE article_count <= 0
+        AND author IN (SELECT key FROM facet_flush_deltas WHERE facet = 'author');
+
+    INSERT INTO facet_tags (tag, article_count)
+    SELECT key, delta FROM facet_flush_deltas WHERE facet = 'tag'
+    ON CONFLICT (tag) DO UPDATE SET article_count = facet_tags.article_count + EXCLUDED.article_count;
+    DELETE FROM facet_tags WHERE article_count <= 0
+        AND tag IN (SELECT key FROM facet_flush_deltas WHERE facet = 'tag');
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS facet_flush_at_commit ON facet_flush;
+CREATE CONSTRAINT TRIGGER facet_flush_at_commit
+    AFTER INSERT ON facet_flush
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION facet_flush_trigger();
+
+-- TRUNCATE articles also discards the deltas the transaction accumulated before it
+CREATE OR REPLACE FUNCTION articles_facets_truncate()
+RETURNS trigger AS $$
+BEGIN
+    TRUNCATE facet_dates, facet_tags, facet_authors;
+    DELETE FROM facet_pending WHERE txid = txid_current();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
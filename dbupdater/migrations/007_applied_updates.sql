@@ -0,0 +1,20 @@
+-- Ledger of applied update files. The updater skips a file whose content hash
+-- matches the last update applied for the same day, instead of deleting and
+-- re-upserting identical rows.
+
+CREATE TABLE IF NOT EXISTS applied_updates (
+    id SERIAL PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    target_date DATE,
+    content_hash TEXT NOT NULL,
+    -- Rows in the update when known (bulk updates), and what applying it changed in articles
+    row_count INTEGER,
+    rows_inserted INTEGER NOT NULL DEFAULT 0,
+    rows_updated INTEGER NOT NULL DEFAULT 0,
+    rows_deleted INTEGER NOT NULL DEFAULT 0,
+    duration_ms INTEGER NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS applied_updates_target_date ON applied_updates (target_date, id DESC);
+CREATE INDEX IF NOT EXISTS applied_updates_file_name ON applied_updates (file_name, id DESC);
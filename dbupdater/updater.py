@@ -1,13 +1,102 @@
 import os
+import re
+import json
 import time
+import hashlib
+import datetime
 import shutil
 import psycopg2
 from psycopg2 import sql
+from migrate import apply_migrations
+from watcher import UpdateWatcher, UPDATER_DEBOUNCE
+import updater_metrics
 
-UPDATES_DIR = "/app/updates"
-PROCESSED_DIR = "/app/processed"
+UPDATES_DIR = os.environ.get("UPDATES_DIR", "/app/updates")
+PROCESSED_DIR = os.environ.get("PROCESSED_DIR", "/app/processed")
 DB_URL = os.environ.get("DATABASE_URL")
 
+# Lets the backend invalidate its response cache as soon as new data is committed
+BUMP_DATA_VERSION = "UPDATE data_version SET version = version + 1, updated_at = now()"
+
+# Update files applied per transaction; each file runs under its own savepoint.
+# Staying under 64 savepoints per transaction keeps Postgres' subtransaction cache from overflowing.
+UPDATER_BATCH_SIZE = int(os.environ.get("UPDATER_BATCH_SIZE", "32"))
+
+# Rows touched in articles so far by the current transaction
+ROW_COUNTS = """
+SELECT n_tup_ins, n_tup_upd, n_tup_del FROM pg_stat_xact_user_tables
+WHERE relid = 'articles'::regclass
+"""
+
+DATE_IN_NAME = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+# Skip files whose content matches the last update applied for the same day (see applied_updates)
+UPDATER_SKIP_UNCHANGED = os.environ.get("UPDATER_SKIP_UNCHANGED", "true").lower() == "true"
+# Bulk updates only delete and rewrite the rows that actually differ, instead of replacing the whole day
+UPDATER_DIFF_MODE = os.environ.get("UPDATER_DIFF_MODE", "true").lower() == "true"
+
+LAST_APPLIED_FOR_DATE = """
+SELECT content_hash FROM applied_updates WHERE target_date = %s ORDER BY id DESC LIMIT 1
+"""
+LAST_APPLIED_FOR_FILE = """
+SELECT content_hash FROM applied_updates WHERE target_date IS NULL AND file_name = %s ORDER BY id DESC LIMIT 1
+"""
+RECORD_APPLIED = """
+INSERT INTO applied_updates
+    (file_name, target_date, content_hash, row_count, rows_inserted, rows_updated, rows_deleted, duration_ms)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# Bulk updates written by the ingestor with OUTPUT_FORMAT=copy: a CSV data file
+# plus this manifest, which is written last and marks the update as complete
+MANIFEST_SUFFIX = ".manifest.json"
+COPY_COLUMNS = ["title", "url", "author", "publication_date", "image_url", "summary", "tags", "reading_time"]
+
+CREATE_STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS articles_staging (
+    line BIGSERIAL,
+    title TEXT,
+    url TEXT,
+    author TEXT,
+    publication_date DATE,
+    image_url TEXT,
+    summary TEXT,
+    tags TEXT[],
+    reading_time TEXT
+)
+"""
+
+# One set-based upsert; when a URL appears twice the last line wins, as with the SQL files
+MERGE_STAGING = """
+INSERT INTO articles (title, url, author, publication_date, image_url, summary, tags, reading_time)
+SELECT DISTINCT ON (url) title, url, author, publication_date, image_url, summary, tags, reading_time
+FROM articles_staging
+ORDER BY url, line DESC
+ON CONFLICT (url) DO UPDATE SET
+    title = EXCLUDED.title,
+    author = EXCLUDED.author,
+    publication_date = EXCLUDED.publication_date,
+    image_url = EXCLUDED.image_url,
+    summary = EXCLUDED.summary,
+    tags = EXCLUDED.tags,
+    reading_time = EXCLUDED.reading_time
+"""
+
+# Diff mode: rows whose values are unchanged are left alone, so they keep their tuple (and id)
+MERGE_STAGING_CHANGED = MERGE_STAGING + """
+WHERE (articles.title, articles.author, articles.publication_date, articles.image_url,
+       articles.summary, articles.tags, articles.reading_time)
+   IS DISTINCT FROM
+      (EXCLUDED.title, EXCLUDED.author, EXCLUDED.publication_date, EXCLUDED.image_url,
+       EXCLUDED.summary, EXCLUDED.tags, EXCLUDED.reading_time)
+"""
+
+# Diff mode: only the day's articles that are no longer in the update are deleted
+DELETE_MISSING = """
+DELETE FROM articles WHERE publication_date = %s
+AND NOT EXISTS (SELECT 1 FROM articles_staging WHERE articles_staging.url = articles.url)
+"""
+
 def get_db_connection():
     try:
         conn = psycopg2.connect(DB_URL)
@@ -16,51 +105,272 @@ def get_db_connection():
         print(f"Error connecting to database: {e}")
         return None
 
-def process_files():
+def run_migrations():
+    conn = get_db_connection()
+    if not conn:
+        return False
+    try:
+        apply_migrations(conn)
+        return True
+    except Exception as e:
+        print(f"Error applying migrations: {e}")
+        return False
+    finally:
+        conn.close()
+
+def is_update_file(filename):
+    """.sql files and bulk update manifests; temporary files (*.tmp) are never picked up."""
+    return filename.endswith(".sql") or filename.endswith(MANIFEST_SUFFIX)
+
+def list_updates(min_age=0):
+    """Pending .sql files and completed bulk updates (by manifest).
+
+    Files modified less than `min_age` seconds ago may still be being written and are left for later.
+    """
+    cutoff = time.time() - min_age
+    files = []
+    for filename in os.listdir(UPDATES_DIR):
+        if not is_update_file(filename):
+            continue
+        try:
+            if min_age and os.path.getmtime(os.path.join(UPDATES_DIR, filename)) > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        files.append(filename)
+    return files
+
+def update_files(filename):
+    """Every file belonging to an update, for moving it to PROCESSED_DIR."""
+    if not filename.endswith(MANIFEST_SUFFIX):
+        return [filename]
+    files = [filename]
+    try:
+        with open(os.path.join(UPDATES_DIR, filename), "r") as f:
+            data = os.path.basename(json.load(f).get("data", ""))
+        if data and os.path.exists(os.path.join(UPDATES_DIR, data)):
+            files.append(data)
+    except (OSError, ValueError):
+        pass
+    return files
+
+def apply_sql_file(cursor, filepath):
+    with open(filepath, "r") as f:
+        sql_content = f.read()
+    cursor.execute(sql_content)
+
+def read_manifest(filepath):
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+def validate_manifest(manifest):
+    """Checks a bulk update manifest and returns the columns of its CSV, in file order. Raises ValueError."""
+    if manifest.get("format") != "csv":
+        raise ValueError(f"unsupported update format {manifest.get('format')!r}")
+    missing = [key for key in ("date", "rows", "columns", "data") if key not in manifest]
+    if missing:
+        raise ValueError(f"manifest lacks {', '.join(missing)}")
+    columns = manifest["columns"]
+    unknown = set(columns) - set(COPY_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown columns {sorted(unknown)}")
+    if len(set(columns)) != len(columns):
+        raise ValueError(f"duplicate columns in {columns}")
+    # The merge upserts on url
+    if "url" not in columns:
+        raise ValueError("the url column is required")
+    return columns
+
+def data_path(manifest):
+    """The CSV of a bulk update, always looked up next to its manifest."""
+    return os.path.join(UPDATES_DIR, os.path.basename(manifest["data"]))
+
+def check_row_count(manifest, loaded):
+    if loaded != manifest["rows"]:
+        raise ValueError(f"manifest announces {manifest['rows']} rows, data file has {loaded}")
+
+def apply_copy_update(cursor, manifest_path):
+    """COPYs the CSV into a staging table, then replaces the day with one upsert. Returns the row count."""
+    manifest = read_manifest(manifest_path)
+    columns = validate_manifest(manifest)
+
+    cursor.execute(CREATE_STAGING)
+    cursor.execute("TRUNCATE articles_staging")
+    copy_sql = sql.SQL("COPY articles_staging ({}) FROM STDIN WITH (FORMAT csv, HEADER true)").format(
+        sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+    with open(data_path(manifest), "r", encoding="utf-8") as f:
+        cursor.copy_expert(copy_sql, f)
+    cursor.execute("SELECT count(*) FROM articles_staging")
+    loaded = cursor.fetchone()[0]
+    check_row_count(manifest, loaded)
+
+    if UPDATER_DIFF_MODE:
+        cursor.execute(DELETE_MISSING, (manifest["date"],))
+        cursor.execute(MERGE_STAGING_CHANGED)
+    else:
+        cursor.execute("DELETE FROM articles WHERE publication_date = %s", (manifest["date"],))
+        cursor.execute(MERGE_STAGING)
+    return loaded
+
+def move_update(filename, suffix=""):
+    for name in update_files(filename):
+        shutil.move(os.path.join(UPDATES_DIR, name), os.path.join(PROCESSED_DIR, name + suffix))
+
+def update_target(filename):
+    """(target date or None, generation time) of an update, from its manifest or its name and mtime."""
+    filepath = os.path.join(UPDATES_DIR, filename)
+    match = DATE_IN_NAME.search(filename)
+    target_date = match.group(1) if match else None
+    try:
+        generated_at = os.path.getmtime(filepath)
+    except OSError:
+        generated_at = 0.0
+    if filename.endswith(MANIFEST_SUFFIX):
+        try:
+            manifest = read_manifest(filepath)
+            target_date = manifest.get("date", target_date)
+            if manifest.get("generated_at"):
+                generated_at = datetime.datetime.fromisoformat(manifest["generated_at"]).timestamp()
+        except (OSError, ValueError):
+            pass
+    return target_date, generated_at
+
+def update_sort_key(filename):
+    """(target date, generation time, name): days in order, and for the same day the newest run last."""
+    target_date, generated_at = update_target(filename)
+    # Files without a date (hand-written SQL) go after the dated ones
+    return (target_date is None, target_date or "", generated_at, filename)
+
+def content_hash(filename):
+    """SHA-256 of what an update would load. For bulk updates that is the CSV plus the
+    manifest's date and columns; the generation time is left out so a rerun that
+    produced the same articles hashes the same."""
+    filepath = os.path.join(UPDATES_DIR, filename)
+    digest = hashlib.sha256()
+    if filename.endswith(MANIFEST_SUFFIX):
+        manifest = read_manifest(filepath)
+        digest.update(json.dumps([manifest.get("date"), manifest.get("columns")]).encode("utf-8"))
+        filepath = data_path(manifest)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_unchanged(cursor, filename, target_date, file_hash):
+    """True when the last update applied for the same day (or, without a date, the same file) had this content."""
+    if target_date:
+        cursor.execute(LAST_APPLIED_FOR_DATE, (target_date,))
+    else:
+        cursor.execute(LAST_APPLIED_FOR_FILE, (filename,))
+    row = cursor.fetchone()
+    return row is not None and row[0] == file_hash
+
+def row_counts(cursor):
+    cursor.execute(ROW_COUNTS)
+    return cursor.fetchone() or (0, 0, 0)
+
+def apply_update(cursor, filename):
+    """Applies one update; returns its row count when the format announces one."""
+    filepath = os.path.join(UPDATES_DIR, filename)
+    if filename.endswith(MANIFEST_SUFFIX):
+        return apply_copy_update(cursor, filepath)
+    apply_sql_file(cursor, filepath)
+    return None
+
+def apply_batch(conn, filenames):
+    """Applies files in one transaction, isolating each behind a savepoint and recording it in
+    applied_updates. Returns (applied, skipped, failed); skipped files were unchanged."""
+    cursor = conn.cursor()
+    applied, skipped, failed = [], [], []
+    changed = 0
+    for filename in filenames:
+        print(f"Processing {filename}...")
+        cursor.execute("SAVEPOINT update_file")
+        try:
+            started = time.monotonic()
+            target_date, _ = update_target(filename)
+            file_hash = content_hash(filename)
+            if UPDATER_SKIP_UNCHANGED and is_unchanged(cursor, filename, target_date, file_hash):
+                cursor.execute("RELEASE SAVEPOINT update_file")
+                print(f"Skipped {filename}: unchanged since it was last applied")
+                updater_metrics.FILES.labels("skipped").inc()
+                skipped.append(filename)
+                continue
+            before = row_counts(cursor)
+            rows = apply_update(cursor, filename)
+            after = row_counts(cursor)
+            inserted, updated, deleted = (a - b for a, b in zip(after, before))
+            duration = time.monotonic() - started
+            duration_ms = int(duration * 1000)
+            cursor.execute(RECORD_APPLIED, (filename, target_date, file_hash, rows,
+                                            inserted, updated, deleted, duration_ms))
+            cursor.execute("RELEASE SAVEPOINT update_file")
+            print(f"Applied {filename}: {inserted} inserted, {updated} updated, {deleted} deleted")
+            updater_metrics.FILES.labels("applied").inc()
+            updater_metrics.APPLY_DURATION.labels("copy" if filename.endswith(MANIFEST_SUFFIX) else "sql").observe(duration)
+            updater_metrics.ROWS.labels("inserted").inc(inserted)
+            updater_metrics.ROWS.labels("updated").inc(updated)
+            updater_metrics.ROWS.labels("deleted").inc(deleted)
+            changed += inserted + updated + deleted
+            applied.append(filename)
+        except Exception as e:
+            # ROLLBACK TO keeps the savepoint open; release it so the next file is not nested one level deeper
+            cursor.execute("ROLLBACK TO SAVEPOINT update_file")
+            cursor.execute("RELEASE SAVEPOINT update_file")
+            print(f"Error processing {filename}: {e}")
+            updater_metrics.FILES.labels("failed").inc()
+            failed.append(filename)
+    if changed:
+        cursor.execute(BUMP_DATA_VERSION)
+    conn.commit()
+    cursor.close()
+    return applied, skipped, failed
+
+def process_files(min_age=0):
+    """Applies pending updates ordered by date, UPDATER_BATCH_SIZE files per transaction.
+
+    Returns how many were applied.
+    """
     if not os.path.exists(UPDATES_DIR):
         print(f"Directory {UPDATES_DIR} does not exist.")
-        return
+        return 0
 
-    files = [f for f in os.listdir(UPDATES_DIR) if f.endswith(".sql")]
+    files = sorted(list_updates(min_age), key=update_sort_key)
+    updater_metrics.PENDING_FILES.set(len(files))
     if not files:
-        return
+        return 0
 
     conn = get_db_connection()
     if not conn:
-        return
+        return 0
 
+    total = 0
     try:
-        cursor = conn.cursor()
-        for filename in files:
-            filepath = os.path.join(UPDATES_DIR, filename)
-            print(f"Processing {filename}...")
-            
+        for start in range(0, len(files), UPDATER_BATCH_SIZE):
+            batch = files[start:start + UPDATER_BATCH_SIZE]
             try:
-                with open(filepath, "r") as f:
-                    sql_content = f.read()
-                
-                cursor.execute(sql_content)
-                conn.commit()
-                print(f"Successfully executed {filename}")
-                
-                # Move to processed
-                shutil.move(filepath, os.path.join(PROCESSED_DIR, filename))
-                print(f"Moved {filename} to {PROCESSED_DIR}")
-                
+                applied, skipped, failed = apply_batch(conn, batch)
             except Exception as e:
+                # Nothing in the batch was committed; the files stay in place for the next sweep
                 conn.rollback()
-                print(f"Error processing {filename}: {e}")
-                # Optional: Move to a 'failed' directory or rename? 
-                # For now, leave it there or maybe rename to .failed to avoid infinite loop if it's a syntax error
-                # Renaming to .failed
-                shutil.move(filepath, os.path.join(PROCESSED_DIR, filename + ".failed"))
+                print(f"Error committing batch of {len(batch)} files: {e}")
+                updater_metrics.BATCH_FAILURES.inc()
+                continue
+            updater_metrics.record_commit()
+            total += len(applied)
+            for filename in applied + skipped:
+                move_update(filename)
+            for filename in failed:
+                # Renamed to .failed so a broken file is not retried forever
+                move_update(filename, ".failed")
                 print(f"Moved failed file {filename} to {PROCESSED_DIR} with .failed extension")
-
-        cursor.close()
+            print(f"Committed {len(applied)} file(s), skipped {len(skipped)} unchanged, moved to {PROCESSED_DIR}")
     except Exception as e:
         print(f"Unexpected error: {e}")
     finally:
         conn.close()
+    return total
 
 def main():
     print("Starting DB Updater Service...")
@@ -68,9 +378,17 @@ def main():
     os.makedirs(UPDATES_DIR, exist_ok=True)
     os.makedirs(PROCESSED_DIR, exist_ok=True)
 
+    migrated = run_migrations()
+    updater_metrics.serve_metrics()
+    watcher = UpdateWatcher(UPDATES_DIR, is_update_file)
+    print(f"Watching {UPDATES_DIR} for updates ({watcher.mode})")
+    process_files()
     while True:
-        process_files()
-        time.sleep(1800)
+        # Returns as soon as a burst of new files has settled, or after a periodic rescan interval
+        watcher.wait()
+        if not migrated:
+            migrated = run_migrations()
+        process_files(min_age=UPDATER_DEBOUNCE)
 
 if __name__ == "__main__":
     main()
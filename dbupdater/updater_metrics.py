@@ -0,0 +1,56 @@
+"""Prometheus metrics of the updater, exported like the ingestor's (see ingestion/ingest_metrics.py)."""
+import os
+import time
+from prometheus_client import Counter, Gauge, Histogram, start_http_server, write_to_textfile, REGISTRY
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+# Empty disables the snapshot
+METRICS_TEXTFILE_DIR = os.environ.get("METRICS_TEXTFILE_DIR", "metrics")
+
+FILES = Counter(
+    "updater_files_total",
+    "Update files by result: applied, skipped (unchanged) or failed",
+    ["result"],
+)
+APPLY_DURATION = Histogram(
+    "updater_apply_duration_seconds",
+    "Time to apply one update file, by format",
+    ["format"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+ROWS = Counter(
+    "updater_rows_total",
+    "Rows changed in articles by applied updates",
+    ["operation"],
+)
+BATCH_FAILURES = Counter(
+    "updater_batch_commit_failures_total",
+    "Batches whose transaction could not be committed (their files are retried)",
+)
+PENDING_FILES = Gauge(
+    "updater_pending_files",
+    "Update files found by the last sweep",
+)
+LAST_SUCCESS = Gauge(
+    "updater_last_success_timestamp_seconds",
+    "When a batch was last committed",
+)
+
+
+def record_commit():
+    LAST_SUCCESS.set(time.time())
+
+
+def serve_metrics():
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
+        print(f"Serving metrics on :{METRICS_PORT}/metrics")
+
+
+def write_snapshot(job):
+    if not METRICS_TEXTFILE_DIR:
+        return
+    os.makedirs(METRICS_TEXTFILE_DIR, exist_ok=True)
+    path = os.path.join(METRICS_TEXTFILE_DIR, f"{job}.prom")
+    write_to_textfile(path, REGISTRY)
+    print(f"Metrics written to {path}")
@@ -0,0 +1,97 @@
+"""Waits for new update files instead of sweeping UPDATES_DIR on a fixed timer.
+
+Uses inotify when it is available (Linux with inotify_simple installed) and
+falls back to polling the directory listing. In both modes a burst of files,
+e.g. from a backfill, is debounced into a single sweep.
+"""
+import os
+import time
+
+try:
+    from inotify_simple import INotify, flags
+    HAS_INOTIFY = True
+except ImportError:
+    HAS_INOTIFY = False
+
+# auto (inotify when possible), inotify or poll
+UPDATER_WATCH = os.environ.get("UPDATER_WATCH", "auto").lower()
+UPDATER_POLL_INTERVAL = float(os.environ.get("UPDATER_POLL_INTERVAL", "5"))
+# Quiet period after the last event before sweeping, and the longest a burst can delay a sweep
+UPDATER_DEBOUNCE = float(os.environ.get("UPDATER_DEBOUNCE", "2"))
+UPDATER_DEBOUNCE_MAX = float(os.environ.get("UPDATER_DEBOUNCE_MAX", "30"))
+# Full sweep even without events, in case some were missed (e.g. on some bind mounts)
+UPDATER_RESCAN_INTERVAL = float(os.environ.get("UPDATER_RESCAN_INTERVAL", "300"))
+
+
+class UpdateWatcher:
+    def __init__(self, directory, is_update_file, mode=UPDATER_WATCH):
+        self.directory = directory
+        self.is_update_file = is_update_file
+        self.mode = "poll"
+        self._inotify = None
+        if mode in ("auto", "inotify") and HAS_INOTIFY:
+            try:
+                self._inotify = INotify()
+                # Files are only reported once complete: closed after writing, or renamed into place
+                self._inotify.add_watch(directory, flags.CLOSE_WRITE | flags.MOVED_TO)
+                self.mode = "inotify"
+            except OSError as e:
+                print(f"inotify unavailable ({e}), polling every {UPDATER_POLL_INTERVAL}s")
+        elif mode == "inotify":
+            print(f"inotify_simple is not installed, polling every {UPDATER_POLL_INTERVAL}s")
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for name in os.listdir(self.directory):
+            if self.is_update_file(name):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                snapshot[name] = (stat.st_mtime, stat.st_size)
+        return snapshot
+
+    def _has_new_files(self, snapshot):
+        return any(self._snapshot.get(name) != entry for name, entry in snapshot.items())
+
+    def wait(self):
+        """Blocks until update files arrive (and then stay quiet for UPDATER_DEBOUNCE seconds)
+        or UPDATER_RESCAN_INTERVAL elapses. Returns True when files arrived."""
+        if self.mode == "inotify":
+            return self._wait_inotify()
+        return self._wait_poll()
+
+    def _wait_inotify(self):
+        events = self._inotify.read(timeout=int(UPDATER_RESCAN_INTERVAL * 1000))
+        if not any(self.is_update_file(event.name) for event in events):
+            return False
+        deadline = time.monotonic() + UPDATER_DEBOUNCE_MAX
+        while time.monotonic() < deadline:
+            if not self._inotify.read(timeout=int(UPDATER_DEBOUNCE * 1000)):
+                break
+        return True
+
+    def _wait_poll(self):
+        started = time.monotonic()
+        while True:
+            time.sleep(UPDATER_POLL_INTERVAL)
+            snapshot = self._scan()
+            if self._has_new_files(snapshot):
+                break
+            self._snapshot = snapshot
+            if time.monotonic() - started >= UPDATER_RESCAN_INTERVAL:
+                return False
+        deadline = time.monotonic() + UPDATER_DEBOUNCE_MAX
+        while time.monotonic() < deadline:
+            time.sleep(UPDATER_DEBOUNCE)
+            latest = self._scan()
+            if latest == snapshot:
+                break
+            snapshot = latest
+        self._snapshot = snapshot
+        return True
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
@@ -1,10 +1,11 @@
 'use client';
 
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import ArticleCard from '../components/ArticleCard';
 import Filters from '../components/Filters';
 
 const API_URL = 'http://localhost:6051'; // In production, use env var
+const PAGE_SIZE = 40;
 
 export default function Home() {
     const [articles, setArticles] = useState([]);
@@ -14,6 +15,11 @@ export default function Home() {
     const [selectedAuthor, setSelectedAuthor] = useState(null);
     const [selectedArticleId, setSelectedArticleId] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const sentinelRef = useRef(null);
+    // Incremented on every new search so late pages from a previous search are dropped
+    const queryIdRef = useRef(0);
 
     const fetchFilters = async () => {
         try {
@@ -30,29 +36,54 @@ export default function Home() {
         }
     };
 
+    const buildArticlesUrl = useCallback(() => {
+        let url = `${API_URL}/articles?limit=${PAGE_SIZE}&`;
+        // If tag is selected, we perform a global search (ignore date)
+        if (selectedTag) {
+            url += `tag=${encodeURIComponent(selectedTag)}&`;
+        } else {
+            if (selectedDate && !selectedAuthor) url += `date=${selectedDate}&`;
+        }
+        if (selectedAuthor) url += `author=${encodeURIComponent(selectedAuthor)}&`;
+        return url;
+    }, [selectedDate, selectedTag, selectedAuthor]);
+
     const fetchArticles = useCallback(async () => {
         if (!selectedDate && !selectedAuthor && filters.dates.length === 0) return;
 
+        const queryId = ++queryIdRef.current;
         setLoading(true);
+        setNextCursor(null);
         try {
-            let url = `${API_URL}/articles?`;
-            // If tag is selected, we perform a global search (ignore date)
-            if (selectedTag) {
-                url += `tag=${encodeURIComponent(selectedTag)}&`;
-            } else {
-                if (selectedDate && !selectedAuthor) url += `date=${selectedDate}&`;
-            }
-            if (selectedAuthor) url += `author=${encodeURIComponent(selectedAuthor)}&`;
-
-            const res = await fetch(url);
+            const res = await fetch(buildArticlesUrl());
             const data = await res.json();
+            if (queryId !== queryIdRef.current) return;
             setArticles(data);
+            setNextCursor(res.headers.get('X-Next-Cursor'));
         } catch (error) {
             console.error('Error fetching articles:', error);
         } finally {
-            setLoading(false);
+            if (queryId === queryIdRef.current) setLoading(false);
+        }
+    }, [selectedDate, selectedAuthor, filters.dates, buildArticlesUrl]);
+
+    const fetchMoreArticles = useCallback(async () => {
+        if (!nextCursor || loadingMore) return;
+
+        const queryId = queryIdRef.current;
+        setLoadingMore(true);
+        try {
+            const res = await fetch(`${buildArticlesUrl()}cursor=${encodeURIComponent(nextCursor)}`);
+            const data = await res.json();
+            if (queryId !== queryIdRef.current) return;
+            setArticles(prev => [...prev, ...data]);
+            setNextCursor(res.headers.get('X-Next-Cursor'));
+        } catch (error) {
+            console.error('Error fetching more articles:', error);
+        } finally {
+            setLoadingMore(false);
         }
-    }, [selectedDate, selectedTag, selectedAuthor, filters.dates]);
+    }, [nextCursor, loadingMore, buildArticlesUrl]);
 
     useEffect(() => {
         fetchFilters();
@@ -64,6 +95,18 @@ export default function Home() {
         }
     }, [selectedDate, selectedTag, selectedAuthor, fetchArticles]);
 
+    // Load the next page when the sentinel below the grid scrolls into view
+    useEffect(() => {
+        const sentinel = sentinelRef.current;
+        if (!sentinel || !nextCursor) return;
+
+        const observer = new IntersectionObserver((entries) => {
+            if (entries[0].isIntersecting) fetchMoreArticles();
+        }, { rootMargin: '400px' });
+        observer.observe(sentinel);
+        return () => observer.disconnect();
+    }, [nextCursor, fetchMoreArticles]);
+
     const handlePrevDate = () => {
         const currentIndex = filters.dates.indexOf(selectedDate);
         if (currentIndex < filters.dates.length - 1) {
@@ -118,7 +161,7 @@ export default function Home() {
                         `Newsletter du ${selectedDate ? new Date(selectedDate).toLocaleDateString('fr-FR', { day: 'numeric', month: 'long', year: 'numeric' }) : '...'}`
                     )}
                     <span className="ml-3 text-sm font-normal text-gray-500 bg-gray-100 px-2 py-1 rounded-full">
-                        {articles.length} articles
+                        {articles.length}{nextCursor ? '+' : ''} articles
                     </span>
                 </h2>
             </div>
@@ -144,6 +187,14 @@ export default function Home() {
                 </div>
             )}
 
+            {!loading && nextCursor && (
+                <div ref={sentinelRef} className="flex justify-center items-center h-24">
+                    {loadingMore && (
+                        <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-blue-dark"></div>
+                    )}
+                </div>
+            )}
+
             {!loading && articles.length === 0 && (
                 <div className="text-center py-20 bg-gray-50 rounded-xl border-2 border-dashed border-gray-200 mt-8">
                     <p className="text-gray-500 text-lg">Aucun article trouvé pour ces critères.</p>
@@ -0,0 +1,77 @@
+"""Compares the BeautifulSoup and lxml extraction backends on saved pages.
+
+Every fixture is parsed with both backends; the extracted fields must be
+identical, then each backend is timed over a number of rounds.
+
+Usage:
+    python benchmarks/bench_parsing.py [--rounds 20] [--fixtures DIR]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extractors
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixtures(directory):
+    pages = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".html"):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                pages[name] = f.read()
+    return pages
+
+
+def extract(name, html, backend):
+    if name.startswith("digest"):
+        return extractors.extract_digest_links(html, backend)
+    return extractors.extract_page(html, backend)
+
+
+def time_backend(pages, backend, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name, html in pages.items():
+            extract(name, html, backend)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction backends")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    if not extractors.HAS_LXML:
+        print("lxml is not installed, nothing to compare.")
+        sys.exit(1)
+
+    pages = load_fixtures(args.fixtures)
+    total_kb = sum(len(html) for html in pages.values()) / 1024
+    print(f"{len(pages)} fixtures, {total_kb:.0f} KiB, {args.rounds} rounds")
+
+    mismatches = 0
+    for name, html in pages.items():
+        expected = extract(name, html, "bs4")
+        actual = extract(name, html, "lxml")
+        if expected != actual:
+            mismatches += 1
+            fields = [k for k in expected if expected[k] != actual[k]] if isinstance(expected, dict) else ["links"]
+            print(f"  MISMATCH {name}: {', '.join(fields)}")
+    print(f"Output identical on {len(pages) - mismatches}/{len(pages)} fixtures")
+
+    timings = {backend: time_backend(pages, backend, args.rounds) for backend in ("bs4", "lxml")}
+    per_page = len(pages) * args.rounds
+    for backend, elapsed in timings.items():
+        print(f"{backend:>5}: {elapsed:.2f}s total, {elapsed / per_page * 1000:.1f} ms/page")
+    print(f"Speedup: {timings['bs4'] / timings['lxml']:.1f}x")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""HTML extraction for Medium article pages and digest emails.
+
+Two interchangeable backends produce identical results:
+- "lxml": XPath over the libxml2 tree, only touching the nodes we need (fast path)
+- "bs4": the original BeautifulSoup/html.parser code, kept as the fallback
+
+PARSER_BACKEND=auto (default) uses lxml when it is installed and falls back
+to BeautifulSoup for a page lxml cannot handle.
+"""
+import os
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+PARSER_BACKEND = os.environ.get("PARSER_BACKEND", "auto").lower()
+
+CONTENT_TAGS = ['p', 'h1', 'h2', 'h3', 'li']
+DEFAULT_READING_TIME = "5 min read"
+
+_CONTENT_XPATH = "//p | //h1 | //h2 | //h3 | //li"
+
+
+def _meta_content(meta):
+    # Same failure mode as soup_tag["content"]: a matching tag without content is an error
+    if meta is None:
+        return None
+    content = meta.get("content")
+    if content is None:
+        raise KeyError("content")
+    return content
+
+
+def _extract_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    og_title = soup.find("meta", property="og:title")
+    title = og_title["content"] if og_title else (soup.title.string if soup.title else "No Title")
+
+    og_desc = soup.find("meta", property="og:description")
+    description = og_desc["content"] if og_desc else ""
+
+    content_elements = soup.find_all(CONTENT_TAGS)
+    body_text = " ".join([elem.get_text() for elem in content_elements])
+
+    og_image = soup.find("meta", property="og:image")
+    image_url = og_image["content"] if og_image else None
+
+    author_meta = soup.find("meta", attrs={"name": "author"})
+    author = author_meta["content"] if author_meta else "Unknown Author"
+
+    reading_time = DEFAULT_READING_TIME
+    reading_time_element = soup.find(string=lambda text: text and "min read" in text)
+    if reading_time_element:
+        reading_time = reading_time_element.strip()
+
+    keywords_meta = soup.find("meta", attrs={"name": "keywords"})
+
+    return {
+        "title": str(title) if title is not None else None,
+        "description": description,
+        "body_text": body_text,
+        "image_url": image_url,
+        "author": author,
+        "reading_time": reading_time,
+        "article_tags": [t["content"] for t in soup.find_all("meta", property="article:tag")],
+        "keywords": keywords_meta["content"] if keywords_meta else None,
+    }
+
+
+def _first(nodes):
+    return nodes[0] if nodes else None
+
+
+def _extract_lxml(html):
+    doc = lxml.html.document_fromstring(html)
+
+    def meta(attr, value):
+        return _first(doc.xpath(f"//meta[@{attr}=$value]", value=value))
+
+    title_meta = _meta_content(meta("property", "og:title"))
+    if title_meta is not None:
+        title = title_meta
+    else:
+        title_element = _first(doc.xpath("//title"))
+        if title_element is None:
+            title = "No Title"
+        else:
+            # Mirrors soup.title.string: the text only when it is the single child
+            title = title_element.text if len(title_element) == 0 else None
+
+    description = _meta_content(meta("property", "og:description"))
+    image_url = _meta_content(meta("property", "og:image"))
+    author = _meta_content(meta("name", "author"))
+    keywords = _meta_content(meta("name", "keywords"))
+    article_tags = [_meta_content(m) for m in doc.xpath("//meta[@property='article:tag']")]
+
+    # Searched before script/style are dropped, like soup.find(string=...) which sees them
+    reading_time = DEFAULT_READING_TIME
+    reading_time_text = _first(doc.xpath("//text()[contains(., 'min read')]"))
+    if reading_time_text is not None:
+        reading_time = str(reading_time_text).strip()
+
+    # BeautifulSoup's get_text() leaves out script and style strings and the text inside
+    # <template> (while still matching the elements in it)
+    etree.strip_elements(doc, "script", "style", with_tail=False)
+    for template in doc.iter("template"):
+        template.text = None
+        for node in template.iterdescendants():
+            node.text = None
+            node.tail = None
+    body_text = " ".join([elem.text_content() for elem in doc.xpath(_CONTENT_XPATH)])
+
+    return {
+        "title": title,
+        "description": description if description is not None else "",
+        "body_text": body_text,
+        "image_url": image_url,
+        "author": author if author is not None else "Unknown Author",
+        "reading_time": reading_time,
+        "article_tags": article_tags,
+        "keywords": keywords,
+    }
+
+
+def resolve_backend(backend=None):
+    backend = (backend or PARSER_BACKEND).lower()
+    if backend == "auto":
+        return "lxml" if HAS_LXML else "bs4"
+    if backend == "lxml" and not HAS_LXML:
+        print("lxml is not installed, using the BeautifulSoup parser.")
+        return "bs4"
+    return backend
+
+
+def extract_page(html, backend=None):
+    """Returns every field the scrapers use from a Medium article page."""
+    if resolve_backend(backend) == "lxml":
+        try:
+            return _extract_lxml(html)
+        except Exception as e:
+            print(f"lxml extraction failed ({e}), falling back to BeautifulSoup")
+    return _extract_bs4(html)
+
+
+def extract_article(html, url, backend=None):
+    """Article dict used by the standardized ingestion pipeline."""
+    page = extract_page(html, backend)
+    return {
+        "title": page["title"],
+        "author": page["author"],
+        "body_text": page["body_text"],
+        "image_url": page["image_url"],
+        "url": url,
+        "reading_time": page["reading_time"],
+    }
+
+
+def parse_article_bytes(content, url, backend=None):
+    """Process-pool entry point: raw UTF-8 page bytes in, article dict (or None) out."""
+    try:
+        return extract_article(content.decode("utf-8", errors="replace"), url, backend)
+    except Exception as e:
+        print(f"Error parsing {url}: {e}")
+        return None
+
+
+def is_article_link(href):
+    # Medium newsletter links typically contain source=email and digest.reader
+    if "medium.com" in href and "digest.reader" in href:
+        parsed = urlparse(href)
+        path_segments = [s for s in parsed.path.split('/') if s]
+        # Articles usually have at least 2 segments: /@user/title-id or /publication/title-id
+        # Filter out 'me/' (settings, profile), 'help.medium.com', and 'jobs-at-medium'
+        return len(path_segments) >= 2 and "me/" not in href and "help.medium.com" not in href and "jobs-at-medium" not in href
+    return False
+
+
+def extract_digest_links(html, backend=None):
+    """Article links found in a digest email's HTML part, in document order."""
+    if resolve_backend(backend) == "lxml":
+        try:
+            hrefs = lxml.html.document_fromstring(html).xpath("//a/@href")
+            return [str(href) for href in hrefs if is_article_link(href)]
+        except Exception as e:
+            print(f"lxml extraction failed ({e}), falling back to BeautifulSoup")
+    soup = BeautifulSoup(html, "html.parser")
+    return [a['href'] for a in soup.find_all('a', href=True) if is_article_link(a['href'])]
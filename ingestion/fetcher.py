@@ -0,0 +1,150 @@
+import os
+import time
+import asyncio
+import aiohttp
+import html_cache
+import ingest_metrics
+
+# Fetch parallelism (total, and per host: every digest link points at medium.com)
+SCRAPE_CONCURRENCY = int(os.environ.get("SCRAPE_CONCURRENCY", "16"))
+SCRAPE_PER_HOST = int(os.environ.get("SCRAPE_PER_HOST", "8"))
+SCRAPE_TIMEOUT = float(os.environ.get("SCRAPE_TIMEOUT", "30"))
+# Max requests per second to Medium / the proxy across the whole run (0 = unlimited)
+SCRAPE_MAX_RPS = float(os.environ.get("SCRAPE_MAX_RPS", "0"))
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Referer": "https://medium.com/",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+
+class FetchResult:
+    def __init__(self, url, status=None, content=None, elapsed=0.0, error=None, source="network"):
+        self.url = url
+        self.status = status
+        # Page body as UTF-8 bytes; decoding is left to the parser processes
+        self.content = content
+        self.elapsed = elapsed
+        self.error = error
+        # "network", "revalidated" (304 from the HTML cache) or "replay"
+        self.source = source
+
+    @property
+    def ok(self):
+        return self.content is not None
+
+
+class FetchStats:
+    """Per-URL timings and failure counts for one ingestion run."""
+
+    def __init__(self):
+        self.results = []
+
+    def record(self, result):
+        self.results.append(result)
+
+    def report(self):
+        if not self.results:
+            return
+        failures = {}
+        for r in self.results:
+            if not r.ok:
+                reason = r.error or f"HTTP {r.status}"
+                failures[reason] = failures.get(reason, 0) + 1
+        timings = sorted(r.elapsed for r in self.results)
+        ok_count = sum(1 for r in self.results if r.ok)
+        print(f"Fetch summary: {ok_count}/{len(self.results)} ok, "
+              f"median {timings[len(timings) // 2]:.2f}s, max {timings[-1]:.2f}s")
+        sources = {}
+        for r in self.results:
+            if r.ok:
+                sources[r.source] = sources.get(r.source, 0) + 1
+        if sources.get("revalidated") or sources.get("replay"):
+            print("  " + ", ".join(f"{count} {source}" for source, count in sorted(sources.items())))
+        for reason, count in sorted(failures.items(), key=lambda item: -item[1]):
+            print(f"  {count} failed: {reason}")
+        for r in sorted(self.results, key=lambda r: -r.elapsed)[:3]:
+            print(f"  slowest: {r.elapsed:.2f}s {r.url}")
+
+
+def proxy_url():
+    return os.environ.get("BRIGHT_DATA_PROXY_URL") or None
+
+
+def to_utf8(body, charset):
+    """Re-encodes a body served in another charset; UTF-8 bodies are passed through untouched."""
+    if not charset or charset.lower().replace("_", "-") in ("utf-8", "utf8"):
+        return body
+    try:
+        return body.decode(charset, errors="replace").encode("utf-8")
+    except LookupError:
+        return body
+
+
+def create_session():
+    """One keep-alive connection pool for the whole run."""
+    connector = aiohttp.TCPConnector(limit=SCRAPE_CONCURRENCY, limit_per_host=SCRAPE_PER_HOST)
+    timeout = aiohttp.ClientTimeout(total=SCRAPE_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS)
+
+
+async def fetch_html(session, url, stats=None, limiter=None):
+    if limiter is not None and not html_cache.REPLAY:
+        await limiter.wait()
+    # Timed from the moment a connection is requested; queueing for a free slot is not counted
+    start = time.monotonic()
+    result = FetchResult(url)
+    cache = html_cache.get_html_cache()
+    try:
+        cached = await cache.run(cache.get, url) if cache else None
+    except Exception as e:
+        # An unreadable cache only costs a full download
+        print(f"HTML cache lookup failed for {url}: {e}")
+        cached = None
+
+    if html_cache.REPLAY:
+        if cached:
+            result.status, result.content, result.source = 200, cached.content, "replay"
+        else:
+            result.error = "not in cache (replay)"
+            print(f"Not in HTML cache, skipping {url}")
+    else:
+        print(f"Scraping {url}...")
+        headers = cached.conditional_headers() if cached else {}
+        try:
+            validators = None
+            async with session.get(url, proxy=proxy_url(), headers=headers) as response:
+                result.status = response.status
+                if response.status == 304 and cached:
+                    result.content, result.source = cached.content, "revalidated"
+                elif response.status == 200:
+                    result.content = to_utf8(await response.read(), response.charset)
+                    validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                else:
+                    print(f"Failed to fetch {url}: Status {response.status}")
+            # Cache writes (compression, sqlite) run on the cache thread, after the connection is released
+            if result.source == "revalidated":
+                await cache.run(cache.touch, url)
+            elif validators and cache:
+                await cache.run(cache.put, url, result.content, *validators)
+        except asyncio.TimeoutError:
+            result.error = "timeout"
+            print(f"Error scraping {url}: timed out after {SCRAPE_TIMEOUT}s")
+        except aiohttp.ClientError as e:
+            result.error = type(e).__name__
+            print(f"Error scraping {url}: {e}")
+        except Exception as e:
+            # Anything else (e.g. a locked HTML cache) only fails this URL, never the whole run
+            result.error = type(e).__name__
+            print(f"Error scraping {url}: {e}")
+
+    result.elapsed = time.monotonic() - start
+    ingest_metrics.SCRAPE_DURATION.labels(result.source if result.ok else "failed").observe(result.elapsed)
+    ingest_metrics.SCRAPE_RESULTS.labels(result.source if result.ok else (result.error or f"HTTP {result.status}")).inc()
+    if stats is not None:
+        stats.record(result)
+    return result
+
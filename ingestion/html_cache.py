@@ -0,0 +1,200 @@
+"""Compressed on-disk store of fetched article HTML, keyed by canonical URL.
+
+Cached pages are revalidated with If-None-Match / If-Modified-Since, so an
+unchanged page costs a 304 instead of a full download through the proxy.
+In replay mode (SCRAPE_REPLAY=true or --replay) pages are served from the
+cache only and the network is never touched.
+
+Usage:
+    python html_cache.py stats
+    python html_cache.py clear
+"""
+import os
+import sys
+import time
+import zlib
+import atexit
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+HTML_CACHE_PATH = os.environ.get(
+    "HTML_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "html_cache.sqlite3"),
+)
+# Set HTML_CACHE=false to always download pages in full
+HTML_CACHE_ENABLED = os.environ.get("HTML_CACHE", "true").lower() == "true"
+REPLAY = os.environ.get("SCRAPE_REPLAY", "false").lower() == "true"
+# Writes are committed in batches of this many pages (or after HTML_CACHE_COMMIT_SECONDS)
+HTML_CACHE_COMMIT_EVERY = int(os.environ.get("HTML_CACHE_COMMIT_EVERY", "32"))
+HTML_CACHE_COMMIT_SECONDS = float(os.environ.get("HTML_CACHE_COMMIT_SECONDS", "2"))
+
+
+def canonical_url(url):
+    """Drops the query string (digest tracking params), fragment and trailing slash."""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
+
+
+class CachedPage:
+    def __init__(self, content, etag=None, last_modified=None, fetched_at=None):
+        # Raw UTF-8 page bytes, decoded on demand
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    @property
+    def html(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTMLCache:
+    """sqlite-backed page store.
+
+    The methods are blocking (zlib plus sqlite I/O); from the event loop call
+    them through `run`, which executes them on the cache's own thread.
+    """
+
+    def __init__(self, path=HTML_CACHE_PATH, commit_every=HTML_CACHE_COMMIT_EVERY,
+                 commit_seconds=HTML_CACHE_COMMIT_SECONDS):
+        self.path = path
+        self.hits = 0
+        self.revalidated = 0
+        self.stored = 0
+        self.commit_every = commit_every
+        self.commit_seconds = commit_seconds
+        self._pending = 0
+        self._first_pending = 0.0
+        self._executor = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Used from the cache thread once the pipeline runs; `run` never overlaps two calls
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # WAL: readers in other processes are not blocked by a pending batch, and commits skip the fsync
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                html BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                raw_size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, url):
+        row = self._conn.execute(
+            "SELECT html, etag, last_modified, fetched_at FROM pages WHERE url = ?", (canonical_url(url),)
+        ).fetchone()
+        if row is None:
+            return None
+        return CachedPage(zlib.decompress(row[0]), row[1], row[2], row[3])
+
+    def put(self, url, html, etag=None, last_modified=None):
+        """Stores a page given as text or as UTF-8 bytes."""
+        raw = html.encode("utf-8") if isinstance(html, str) else html
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages (url, html, etag, last_modified, raw_size, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (canonical_url(url), zlib.compress(raw, 6), etag, last_modified, len(raw), time.time()),
+        )
+        self.stored += 1
+        self._written()
+
+    def touch(self, url):
+        """Records a successful revalidation (304) of a cached page."""
+        self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), canonical_url(url)))
+        self.revalidated += 1
+        self._written()
+
+    def _written(self):
+        now = time.monotonic()
+        if not self._pending:
+            self._first_pending = now
+        self._pending += 1
+        if self._pending >= self.commit_every or now - self._first_pending >= self.commit_seconds:
+            self.flush()
+
+    def flush(self):
+        """Commits the pending batch of writes."""
+        if self._pending:
+            self._conn.commit()
+            self._pending = 0
+
+    async def run(self, method, *args):
+        """Awaits `method(*args)` (e.g. cache.get) on the cache thread, off the event loop."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="html-cache")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, method, *args)
+
+    def stats(self):
+        count, raw, stored = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(html)), 0) FROM pages"
+        ).fetchone()
+        return {"path": self.path, "pages": count, "raw_bytes": raw, "stored_bytes": stored}
+
+    def clear(self):
+        removed = self._conn.execute("DELETE FROM pages").rowcount
+        self._conn.commit()
+        self._conn.execute("VACUUM")
+        return removed
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.flush()
+        self._conn.close()
+
+
+_cache = None
+
+
+def get_html_cache():
+    """Process-wide cache instance, or None when disabled (replay always needs it)."""
+    global _cache
+    if (HTML_CACHE_ENABLED or REPLAY) and _cache is None:
+        _cache = HTMLCache()
+        # Commits the last partial batch
+        atexit.register(_cache.flush)
+    return _cache
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = HTMLCache()
+    try:
+        if command == "stats":
+            stats = cache.stats()
+            ratio = stats["stored_bytes"] / stats["raw_bytes"] if stats["raw_bytes"] else 0
+            print(f"Cache: {stats['path']}")
+            print(f"Pages: {stats['pages']}")
+            print(f"Size: {stats['stored_bytes'] / 1024:.1f} KiB compressed "
+                  f"({stats['raw_bytes'] / 1024:.1f} KiB raw, ratio {ratio:.2f})")
+        elif command == "clear":
+            print(f"Removed {cache.clear()} pages.")
+        else:
+            print("Usage: python html_cache.py [stats|clear]")
+            sys.exit(1)
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Bulk retrieval of Medium digests over a single IMAP session.
+
+For a date range this costs one SEARCH, one header FETCH (subject, internal
+date and BODYSTRUCTURE of every candidate) and one FETCH of just the HTML
+parts of the chosen digests, instead of a SEARCH plus a full RFC822 download
+per day. Messages are read with BODY.PEEK so they are not marked as seen.
+"""
+import re
+import base64
+import quopri
+import email
+import datetime
+from extractors import extract_digest_links
+
+DIGEST_SENDER = "noreply@medium.com"
+
+
+class DigestFetchError(Exception):
+    """The mailbox could not be searched or the digest headers could not be fetched."""
+
+_TOKEN = re.compile(
+    rb'\s*(?:(?P<open>\()|(?P<close>\))|"(?P<quoted>(?:[^"\\]|\\.)*)"'
+    rb'|(?P<literal>\{\d+\})\s*$|(?P<atom>[^\s()"\[]+(?:\[[^\]]*\][^\s()"]*)?))'
+)
+
+
+def imap_date(day):
+    return day.strftime("%d-%b-%Y")
+
+
+def _tokens(data):
+    """Flattens imaplib's FETCH data (bytes and (prefix, literal) tuples) into tokens."""
+    for chunk in data:
+        literal = None
+        if isinstance(chunk, tuple):
+            chunk, literal = chunk
+        pos = 0
+        while pos < len(chunk):
+            match = _TOKEN.match(chunk, pos)
+            if not match or match.end() == pos:
+                break
+            pos = match.end()
+            kind = match.lastgroup
+            if kind == "literal":
+                continue
+            if kind == "quoted":
+                yield "string", re.sub(rb'\\(.)', rb'\1', match.group(kind)).decode("utf-8", errors="replace")
+            elif kind == "atom":
+                yield "atom", match.group(kind).decode("ascii", errors="replace")
+            else:
+                yield kind, None
+        if literal is not None:
+            yield "string", literal
+
+
+def _parse_list(tokens):
+    items = []
+    for kind, value in tokens:
+        if kind == "open":
+            items.append(_parse_list(tokens))
+        elif kind == "close":
+            return items
+        elif kind == "atom" and value.upper() == "NIL":
+            items.append(None)
+        else:
+            items.append(value)
+    return items
+
+
+def parse_fetch_response(data):
+    """Returns {uid: {ITEM: value}} for a UID FETCH response."""
+    messages = {}
+    tokens = _tokens(data)
+    for kind, value in tokens:
+        if kind == "open":
+            fields = _parse_list(tokens)
+            items = {str(fields[i]).upper(): fields[i + 1] for i in range(0, len(fields) - 1, 2)}
+            if "UID" in items:
+                messages[int(items["UID"])] = items
+    return messages
+
+
+def find_html_parts(structure, prefix=""):
+    """(section, encoding, charset) of every text/html part in a BODYSTRUCTURE."""
+    if not structure:
+        return []
+    if isinstance(structure[0], list):
+        # multipart: child parts first, then the subtype
+        parts = []
+        number = 0
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            number += 1
+            parts.extend(find_html_parts(child, f"{prefix}{number}."))
+        return parts
+    media_type, subtype = str(structure[0]).lower(), str(structure[1]).lower()
+    if media_type != "text" or subtype != "html":
+        return []
+    params = structure[2] or []
+    charset = "utf-8"
+    for i in range(0, len(params) - 1, 2):
+        if str(params[i]).lower() == "charset":
+            charset = str(params[i + 1])
+    encoding = str(structure[5] or "7BIT").upper()
+    # A single-part message still addresses its body as section 1
+    return [(prefix.rstrip(".") or "1", encoding, charset)]
+
+
+def decode_part(payload, encoding, charset):
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    if encoding == "BASE64":
+        payload = base64.b64decode(payload)
+    elif encoding == "QUOTED-PRINTABLE":
+        payload = quopri.decodestring(payload)
+    try:
+        return payload.decode(charset, errors="replace")
+    except LookupError:
+        return payload.decode("utf-8", errors="replace")
+
+
+def internal_day(value):
+    """Calendar day of an INTERNALDATE ("17-Nov-2025 07:12:03 +0000"), as used by IMAP ON/SINCE."""
+    return datetime.datetime.strptime(value.split()[0], "%d-%b-%Y").date()
+
+
+class Digest:
+    def __init__(self, day, uid, subject, parts=None):
+        self.day = day
+        self.uid = uid
+        self.subject = subject
+        # (section, encoding, charset) from BODYSTRUCTURE, then the decoded HTML of each
+        self.parts = parts or []
+        self.html_parts = []
+        # Set when the body could not be downloaded; such a digest must not be ingested
+        self.error = None
+
+    def links(self):
+        links = []
+        for html in self.html_parts:
+            links.extend(extract_digest_links(html))
+        return list(set(links))
+
+
+def fetch_digests(mail, start_date, end_date):
+    """Returns {day: Digest} for every day in [start_date, end_date] with a digest.
+
+    As with the single-day search, the latest message of a day is the digest.
+    Raises DigestFetchError when the search or the header fetch fails (an empty
+    result would otherwise read as "no digest"); a failed body fetch sets the
+    affected digests' `error` instead.
+    """
+    mail.select("inbox")
+    criteria = (f'(FROM "{DIGEST_SENDER}" SINCE "{imap_date(start_date)}" '
+                f'BEFORE "{imap_date(end_date + datetime.timedelta(days=1))}")')
+    print(f"Searching with criteria: {criteria}")
+    status, data = mail.uid("SEARCH", None, criteria)
+    if status != "OK":
+        raise DigestFetchError(f"search failed: {status}")
+    if not data or not data[0]:
+        return {}
+    uids = data[0].split()
+    print(f"{len(uids)} candidate messages, fetching headers...")
+
+    status, data = mail.uid(
+        "FETCH", b",".join(uids).decode(),
+        "(UID INTERNALDATE BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (SUBJECT DATE)])",
+    )
+    if status != "OK":
+        raise DigestFetchError(f"header fetch failed: {status}")
+
+    digests = {}
+    for uid, items in parse_fetch_response(data).items():
+        day = internal_day(items["INTERNALDATE"])
+        if not start_date <= day <= end_date:
+            continue
+        if day in digests and digests[day].uid > uid:
+            continue
+        header = next((v for k, v in items.items() if k.startswith("BODY[HEADER")), b"") or b""
+        subject = email.message_from_bytes(header if isinstance(header, bytes) else header.encode())["subject"]
+        digests[day] = Digest(day, uid, subject, find_html_parts(items.get("BODYSTRUCTURE")))
+
+    # One FETCH per distinct set of HTML sections (normally a single round-trip)
+    groups = {}
+    for digest in digests.values():
+        sections = tuple(section for section, _, _ in digest.parts) or ("",)
+        groups.setdefault(sections, []).append(digest)
+    for sections, members in groups.items():
+        wanted = " ".join(f"BODY.PEEK[{section}]" for section in sections)
+        status, data = mail.uid("FETCH", ",".join(str(d.uid) for d in members), f"({wanted})")
+        if status != "OK":
+            print(f"Body fetch failed: {status}")
+            for digest in members:
+                digest.error = f"body fetch failed: {status}"
+            continue
+        fetched = parse_fetch_response(data)
+        for digest in members:
+            items = fetched.get(digest.uid, {})
+            if sections == ("",):
+                # No text/html part in the structure: fall back to parsing the whole message
+                msg = email.message_from_bytes(items.get("BODY[]") or b"")
+                for part in msg.walk():
+                    if part.get_content_type() == "text/html":
+                        payload = part.get_payload(decode=True) or b""
+                        digest.html_parts.append(payload.decode(part.get_content_charset() or "utf-8", errors="replace"))
+                continue
+            for section, encoding, charset in digest.parts:
+                payload = items.get(f"BODY[{section}]")
+                if payload is not None:
+                    digest.html_parts.append(decode_part(payload, encoding, charset))
+    for digest in digests.values():
+        if not digest.html_parts and digest.error is None:
+            digest.error = "no HTML part fetched"
+    return digests
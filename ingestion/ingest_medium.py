@@ -3,10 +3,12 @@ import imaplib
 import email
 import datetime
 import requests
-from bs4 import BeautifulSoup
 import deepl
 from email.header import decode_header
 from dotenv import load_dotenv
+import html_cache
+from extractors import extract_page, extract_digest_links
+from update_sql import write_sql_update
 
 # Load environment variables from .env file
 load_dotenv("../.env")
@@ -42,8 +44,6 @@ def get_latest_newsletter(mail):
             return msg
     return None
 
-from urllib.parse import urlparse
-
 def extract_links(msg):
     links = []
     if msg.is_multipart():
@@ -55,21 +55,8 @@ def extract_links(msg):
                     print(f"Error decoding HTML: {e}")
                     continue
                 
-                soup = BeautifulSoup(html_content, "html.parser")
-                for a in soup.find_all('a', href=True):
-                    href = a['href']
-                    
-                    # Medium newsletter links typically contain source=email and digest.reader
-                    if "medium.com" in href and "digest.reader" in href:
-                        # Parse URL to check structure
-                        parsed = urlparse(href)
-                        path_segments = [s for s in parsed.path.split('/') if s]
-                        
-                        # Articles usually have at least 2 segments: /@user/title-id or /publication/title-id
-                        # Profiles/Publications usually have 1: /@user or /publication
-                        # Filter out 'me/' (settings, profile), 'help.medium.com', and 'jobs-at-medium'
-                        if len(path_segments) >= 2 and "me/" not in href and "help.medium.com" not in href and "jobs-at-medium" not in href:
-                            links.append(href)
+                # Article links only (see extractors.is_article_link for the filtering rules)
+                links.extend(extract_digest_links(html_content))
     return list(set(links)) # Deduplicate
 
 def scrape_article(url):
@@ -94,49 +81,45 @@ def scrape_article(url):
         # or ensure certificates are correct. For now, we'll keep verify=True unless issues arise.
     
     try:
-        response = requests.get(url, headers=headers, proxies=proxies, timeout=30) # Increased timeout for proxy
-        if response.status_code != 200:
-            print(f"Failed to fetch {url}: Status {response.status_code}")
-            return None
+        # Serve from / revalidate against the local HTML cache (see html_cache.py)
+        cache = html_cache.get_html_cache()
+        cached = cache.get(url) if cache else None
+        if html_cache.REPLAY:
+            if not cached:
+                print(f"Not in HTML cache, skipping {url}")
+                return None
+            html = cached.html
+        else:
+            if cached:
+                headers.update(cached.conditional_headers())
+            response = requests.get(url, headers=headers, proxies=proxies, timeout=30) # Increased timeout for proxy
+            if response.status_code == 304 and cached:
+                cache.touch(url)
+                html = cached.html
+            elif response.status_code != 200:
+                print(f"Failed to fetch {url}: Status {response.status_code}")
+                return None
+            else:
+                html = response.text
+                if cache:
+                    cache.put(url, html, response.headers.get("ETag"), response.headers.get("Last-Modified"))
             
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Extract Metadata
-        og_title = soup.find("meta", property="og:title")
-        title = og_title["content"] if og_title else (soup.title.string if soup.title else "No Title")
-        
-        og_desc = soup.find("meta", property="og:description")
-        description = og_desc["content"] if og_desc else ""
-        
+        page = extract_page(html)
+        title = page["title"]
+        description = page["description"]
         # Extract Body Text for better tag extraction
-        body_text = ""
-        # Medium articles usually have content in <p>, <h2>, <h3> tags
-        content_elements = soup.find_all(['p', 'h1', 'h2', 'h3', 'li'])
-        body_text = " ".join([elem.get_text() for elem in content_elements])
-        
-        og_image = soup.find("meta", property="og:image")
-        image_url = og_image["content"] if og_image else "https://placehold.co/600x400"
-        
-        author_meta = soup.find("meta", attrs={"name": "author"})
-        author = author_meta["content"] if author_meta else "Unknown Author"
-        
-        # Try to find reading time (often in text like "5 min read")
-        reading_time = "5 min read" # Default
-        reading_time_element = soup.find(string=lambda text: text and "min read" in text)
-        if reading_time_element:
-            reading_time = reading_time_element.strip()
+        body_text = page["body_text"]
+        image_url = page["image_url"] or "https://placehold.co/600x400"
+        author = page["author"]
+        reading_time = page["reading_time"]
         
         # Tags - Try article:tag first
-        tags = []
-        article_tags = soup.find_all("meta", property="article:tag")
-        if article_tags:
-            tags = [t["content"] for t in article_tags]
+        tags = list(page["article_tags"])
         
         # If no meta tags, or to supplement, use content analysis
         if len(tags) < 3:
-            keywords_meta = soup.find("meta", attrs={"name": "keywords"})
-            if keywords_meta:
-                meta_keywords = [t.strip() for t in keywords_meta["content"].split(",") if t.strip()]
+            if page["keywords"]:
+                meta_keywords = [t.strip() for t in page["keywords"].split(",") if t.strip()]
                 for k in meta_keywords:
                     if k not in tags:
                         tags.append(k)
@@ -232,39 +215,9 @@ def translate_summary(text):
 def generate_sql(articles, target_date):
     filename = f"medium-{target_date.strftime('%Y-%m-%d')}.sql"
     filepath = os.path.join(OUTPUT_DIR, filename)
-    
-    with open(filepath, "w") as f:
-        # Add DELETE statement to clear existing data for this date
-        # This ensures we remove any "phantom" articles from previous runs
-        f.write(f"DELETE FROM articles WHERE publication_date = '{target_date.strftime('%Y-%m-%d')}';\n\n")
-        
-        for article in articles:
-            # Escape single quotes for SQL
-            title = article['title'].replace("'", "''")
-            summary = article['summary'].replace("'", "''")
-            author = article['author'].replace("'", "''")
-            tags_str = "{" + ",".join([f'"{t}"' for t in article['tags']]) + "}"
-            
-            # Define variables for direct use in f-string, escaping if necessary
-            url = article['url'].replace("'", "''")
-            publication_date = article['publication_date'].replace("'", "''")
-            image_url = article['image_url'].replace("'", "''")
-            reading_time = article['reading_time'].replace("'", "''")
 
-            sql = f"""
-            INSERT INTO articles (title, url, author, publication_date, image_url, summary, tags, reading_time)
-            VALUES ('{title}', '{url}', '{author}', '{publication_date}', '{image_url}', '{summary}', '{tags_str}', '{reading_time}')
-            ON CONFLICT (url) DO UPDATE SET
-                title = EXCLUDED.title,
-                author = EXCLUDED.author,
-                publication_date = EXCLUDED.publication_date,
-                image_url = EXCLUDED.image_url,
-                summary = EXCLUDED.summary,
-                tags = EXCLUDED.tags,
-                reading_time = EXCLUDED.reading_time;
-            """
-            f.write(sql + "\n")
-            
+    # Same statements as ingest_standardized: a diff against the day, or a full delete-and-reinsert
+    write_sql_update(filepath, articles, target_date.strftime('%Y-%m-%d'))
     print(f"Generated {filepath}")
 
 import sys
@@ -297,10 +250,15 @@ def main():
         print("Please set GMAIL_USER and GMAIL_PASS environment variables.")
         return
 
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--replay" in sys.argv:
+        # Re-parse articles from the HTML cache only, without touching the network
+        html_cache.REPLAY = True
+
     # Parse date argument or use today
-    if len(sys.argv) > 1:
+    if args:
         try:
-            target_date = datetime.datetime.strptime(sys.argv[1], "%Y-%m-%d").date()
+            target_date = datetime.datetime.strptime(args[0], "%Y-%m-%d").date()
         except ValueError:
             print("Invalid date format. Use YYYY-MM-DD.")
             return
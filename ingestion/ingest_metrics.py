@@ -0,0 +1,78 @@
+"""Prometheus metrics of the ingestion pipeline.
+
+The scheduler is long-running and serves them on METRICS_PORT. One-shot runs
+(a single day, a range or a backfill) write a snapshot to METRICS_TEXTFILE_DIR
+when they finish, for node_exporter's textfile collector.
+"""
+import os
+import time
+from prometheus_client import Counter, Gauge, Histogram, start_http_server, write_to_textfile, REGISTRY
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+# Empty disables the snapshot
+METRICS_TEXTFILE_DIR = os.environ.get("METRICS_TEXTFILE_DIR", "metrics")
+
+SCRAPE_DURATION = Histogram(
+    "ingest_scrape_duration_seconds",
+    "Time to fetch one article page, by where it came from",
+    ["source"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30),
+)
+SCRAPE_RESULTS = Counter(
+    "ingest_scrape_results_total",
+    "Article fetches by outcome (source when ok, the failure reason otherwise)",
+    ["outcome"],
+)
+PARSE_DURATION = Histogram(
+    "ingest_parse_duration_seconds",
+    "Time to extract one article page, queueing for a parse worker included",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+LLM_DURATION = Histogram(
+    "ingest_llm_duration_seconds",
+    "Time to get the summary and tags of one article, retries included",
+    ["result"],
+    buckets=(0.01, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160),
+)
+LLM_RETRIES = Counter(
+    "ingest_llm_retries_total",
+    "LLM calls retried after an error or an unparsable answer",
+)
+ARTICLES_SKIPPED = Counter(
+    "ingest_articles_skipped_total",
+    "Fetched pages that did not become articles",
+    ["reason"],
+)
+ARTICLES_INGESTED = Counter(
+    "ingest_articles_total",
+    "Articles that came out of the pipeline",
+)
+LAST_RUN = Gauge(
+    "ingest_last_run_timestamp_seconds",
+    "When the last ingestion of a day finished",
+)
+LAST_RUN_ARTICLES = Gauge(
+    "ingest_last_run_articles",
+    "Articles produced by the last ingestion of a day",
+)
+
+
+def record_run(article_count):
+    LAST_RUN.set(time.time())
+    LAST_RUN_ARTICLES.set(article_count)
+
+
+def serve_metrics():
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
+        print(f"Serving metrics on :{METRICS_PORT}/metrics")
+
+
+def write_snapshot(job):
+    """Writes every metric to METRICS_TEXTFILE_DIR/<job>.prom (atomically, as the collector expects)."""
+    if not METRICS_TEXTFILE_DIR:
+        return
+    os.makedirs(METRICS_TEXTFILE_DIR, exist_ok=True)
+    path = os.path.join(METRICS_TEXTFILE_DIR, f"{job}.prom")
+    write_to_textfile(path, REGISTRY)
+    print(f"Metrics written to {path}")
@@ -2,15 +2,24 @@ import os
 import imaplib
 import email
 import datetime
-import requests
 import sys
+import csv
 import json
+import time
+import atexit
 import asyncio
-from bs4 import BeautifulSoup
 from email.header import decode_header
 from dotenv import load_dotenv
-from urllib.parse import urlparse
 from langchain_openai import ChatOpenAI
+import html_cache
+from fetcher import create_session, fetch_html, FetchStats, SCRAPE_CONCURRENCY, SCRAPE_MAX_RPS
+from ratelimit import AsyncRateLimiter
+from extractors import extract_digest_links
+from imap_digests import fetch_digests
+from parse_pool import create_parse_pool, parse_page, PARSE_WORKERS
+from update_sql import write_sql_update
+from llm_cache import LLMCache, LLM_CACHE_ENABLED, make_key as make_llm_cache_key
+import ingest_metrics
 
 # Load environment variables
 if os.path.exists(".env"):
@@ -25,11 +34,30 @@ IMAP_SERVER = "imap.gmail.com"
 EMAIL_USER = os.environ.get("GMAIL_USER", "").strip('"')
 EMAIL_PASS = os.environ.get("GMAIL_PASS", "").strip('"')
 OUTPUT_DIR = os.environ.get("OUTPUT_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "updates"))
+# "sql": one INSERT ... ON CONFLICT per article; "copy": CSV + manifest loaded by the updater with COPY
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "sql").lower()
+
+# Column order of the CSV files written for OUTPUT_FORMAT=copy
+COPY_COLUMNS = ["title", "url", "author", "publication_date", "image_url", "summary", "tags", "reading_time"]
 
 # Standardized LLM / MCP Config
 MODEL_NAME = os.environ.get("MODEL_NAME", "ai/gemma3").strip('"')
 BASE_URL = os.environ.get("BASE_URL", "http://model-runner.docker.internal/engines/llama.cpp/v1").strip('"')
 
+# Pipeline tuning: parallel LLM calls (1 keeps a single local model saturated),
+# max LLM calls per second (0 = unlimited) and the size of the queues between stages
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", "1"))
+LLM_MAX_RPS = float(os.environ.get("LLM_MAX_RPS", "0"))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "8"))
+# Without an LLM worker nothing drains the article queue and the pipeline stalls once it is full
+if LLM_CONCURRENCY < 1:
+    raise ValueError(f"LLM_CONCURRENCY must be at least 1, got {LLM_CONCURRENCY}")
+
+SYSTEM_TITLES = ["Work at Medium", "Medium Help Center"]
+
+# Bump whenever the extraction prompt below changes, so cached answers are not reused
+PROMPT_VERSION = "1"
+
 # Initialize LLM (Docker Model Runner)
 llm = ChatOpenAI(
     model=MODEL_NAME,
@@ -37,6 +65,16 @@ llm = ChatOpenAI(
     base_url=BASE_URL,
 )
 
+_llm_cache = None
+
+def get_llm_cache():
+    global _llm_cache
+    if LLM_CACHE_ENABLED and _llm_cache is None:
+        _llm_cache = LLMCache()
+        # Commits the last partial batch
+        atexit.register(_llm_cache.flush)
+    return _llm_cache
+
 def connect_gmail():
     mail = imaplib.IMAP4_SSL(IMAP_SERVER)
     mail.login(EMAIL_USER, EMAIL_PASS)
@@ -72,75 +110,9 @@ def extract_links(msg):
                     print(f"Error decoding HTML: {e}")
                     continue
                 
-                soup = BeautifulSoup(html_content, "html.parser")
-                for a in soup.find_all('a', href=True):
-                    href = a['href']
-                    if "medium.com" in href and "digest.reader" in href:
-                        parsed = urlparse(href)
-                        path_segments = [s for s in parsed.path.split('/') if s]
-                        if len(path_segments) >= 2 and "me/" not in href and "help.medium.com" not in href and "jobs-at-medium" not in href:
-                            links.append(href)
+                links.extend(extract_digest_links(html_content))
     return list(set(links))
 
-def scrape_article(url):
-    print(f"Scraping {url}...")
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-        "Referer": "https://medium.com/",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Upgrade-Insecure-Requests": "1"
-    }
-    
-    # Proxy Configuration
-    BRIGHT_DATA_PROXY_URL = os.environ.get("BRIGHT_DATA_PROXY_URL")
-    proxies = {}
-    if BRIGHT_DATA_PROXY_URL:
-        proxies = {
-            "http": BRIGHT_DATA_PROXY_URL,
-            "https": BRIGHT_DATA_PROXY_URL
-        }
-    
-    try:
-        response = requests.get(url, headers=headers, proxies=proxies, timeout=30)
-        if response.status_code != 200:
-            print(f"Failed to fetch {url}: Status {response.status_code}")
-            return None
-            
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Extract Metadata
-        og_title = soup.find("meta", property="og:title")
-        title = og_title["content"] if og_title else (soup.title.string if soup.title else "No Title")
-        
-        # Extract Body Text for LLM
-        content_elements = soup.find_all(['p', 'h1', 'h2', 'h3', 'li'])
-        body_text = " ".join([elem.get_text() for elem in content_elements])
-        
-        og_image = soup.find("meta", property="og:image")
-        image_url = og_image["content"] if og_image else None
-        
-        author_meta = soup.find("meta", attrs={"name": "author"})
-        author = author_meta["content"] if author_meta else "Unknown Author"
-        
-        reading_time = "5 min read"
-        reading_time_element = soup.find(string=lambda text: text and "min read" in text)
-        if reading_time_element:
-            reading_time = reading_time_element.strip()
-            
-        return {
-            "title": title,
-            "author": author,
-            "body_text": body_text,
-            "image_url": image_url,
-            "url": url,
-            "reading_time": reading_time
-        }
-
-    except Exception as e:
-        print(f"Error scraping {url}: {e}")
-        return None
-
 async def pre_warm_model():
     """Wait for the model to be loaded and ready."""
     print(f"Waiting for model {MODEL_NAME} to be ready...")
@@ -148,7 +120,7 @@ async def pre_warm_model():
     for i in range(max_prewarm_attempts):
         try:
             # Simple prompt to check readiness
-            llm.invoke("Hi")
+            await llm.ainvoke("Hi")
             print("Model is ready.")
             return True
         except Exception as e:
@@ -156,14 +128,30 @@ async def pre_warm_model():
             await asyncio.sleep(10)
     return False
 
-async def agentic_metadata_extraction(title, raw_content):
+async def agentic_metadata_extraction(title, raw_content, limiter=None):
     """Uses LLM to generate summary and tags in a standardized way."""
+    start = time.monotonic()
+    content = raw_content[:4000]
+    cache = get_llm_cache()
+    cache_key = make_llm_cache_key(MODEL_NAME, PROMPT_VERSION, title, content)
+    if cache:
+        try:
+            cached = await cache.run(cache.get, cache_key)
+        except Exception as e:
+            # An unreadable cache only costs a model call
+            print(f"LLM cache lookup failed for {title}: {e}")
+            cached = None
+        if cached:
+            print(f"LLM cache hit for: {title}")
+            ingest_metrics.LLM_DURATION.labels("cache").observe(time.monotonic() - start)
+            return cached
+
     prompt = f"""
     Basé sur le titre "{title}" et le contenu suivant de l'article, génère :
     1. Un résumé en français de maximum 3 lignes.
     2. Une liste de 3 à 5 tags pertinents (en anglais technique uniquement).
 
-    Contenu : {raw_content[:4000]}
+    Contenu : {content}
     
     Réponds uniquement au format JSON : {{"summary": "...", "tags": ["tag1", "tag2"]}}
     """
@@ -171,7 +159,9 @@ async def agentic_metadata_extraction(title, raw_content):
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            response = llm.invoke(prompt)
+            if limiter:
+                await limiter.wait()
+            response = await llm.ainvoke(prompt)
             raw_response = response.content.strip()
             # Clean potential markdown backticks
             if raw_response.startswith("```json"):
@@ -180,12 +170,23 @@ async def agentic_metadata_extraction(title, raw_content):
                 raw_response = raw_response[3:-3].strip()
                 
             data = json.loads(raw_response)
-            return data.get("summary"), data.get("tags")
+            summary, tags = data.get("summary"), data.get("tags")
+            # Only real answers are cached, never the fallback below
+            if cache and isinstance(summary, str) and summary and isinstance(tags, list):
+                try:
+                    await cache.run(cache.put, cache_key, MODEL_NAME, summary, tags)
+                except Exception as e:
+                    # Not a reason to ask the model again
+                    print(f"LLM cache write failed for {title}: {e}")
+            ingest_metrics.LLM_DURATION.labels("ok").observe(time.monotonic() - start)
+            return summary, tags
         except Exception as e:
             print(f"LLM Extraction error (attempt {attempt+1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
+                ingest_metrics.LLM_RETRIES.inc()
                 await asyncio.sleep(5 * (attempt + 1)) # Wait longer each time
             else:
+                ingest_metrics.LLM_DURATION.labels("fallback").observe(time.monotonic() - start)
                 return "Résumé non disponible", ["Tech"]
 
 def generate_sql(articles, target_date):
@@ -195,36 +196,185 @@ def generate_sql(articles, target_date):
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
-    with open(filepath, "w") as f:
-        f.write(f"DELETE FROM articles WHERE publication_date = '{target_date.strftime('%Y-%m-%d')}';\n\n")
-        
-        for article in articles:
-            title = article['title'].replace("'", "''")
-            summary = article['summary'].replace("'", "''")
-            author = article['author'].replace("'", "''")
-            tags = article.get('tags', ["Tech"])
-            tags_str = "{" + ",".join(['"' + t.replace("'", "''") + '"' for t in tags]) + "}"
-            url = article['url'].replace("'", "''")
-            publication_date = article['publication_date'].replace("'", "''")
-            image_url = (article['image_url'] or "").replace("'", "''")
-            reading_time = article['reading_time'].replace("'", "''")
-
-            sql = f"""
-            INSERT INTO articles (title, url, author, publication_date, image_url, summary, tags, reading_time)
-            VALUES ('{title}', '{url}', '{author}', '{publication_date}', '{image_url}', '{summary}', '{tags_str}', '{reading_time}')
-            ON CONFLICT (url) DO UPDATE SET
-                title = EXCLUDED.title,
-                author = EXCLUDED.author,
-                publication_date = EXCLUDED.publication_date,
-                image_url = EXCLUDED.image_url,
-                summary = EXCLUDED.summary,
-                tags = EXCLUDED.tags,
-                reading_time = EXCLUDED.reading_time;
-            """
-            f.write(sql + "\n")
-            
+    write_sql_update(filepath, articles, target_date.strftime('%Y-%m-%d'))
     print(f"Generated {filepath}")
 
+def pg_array(values):
+    """Postgres array literal for a text[] column in a COPY file."""
+    return "{" + ",".join('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values) + "}"
+
+def generate_copy(articles, target_date):
+    """Writes medium-<date>.csv, then medium-<date>.manifest.json once the data is complete.
+
+    The updater only picks up the manifest, so a half-written CSV is never loaded;
+    both files are renamed into place once complete.
+    """
+    day = target_date.strftime('%Y-%m-%d')
+    data_filename = f"medium-{day}.csv"
+    data_path = os.path.join(OUTPUT_DIR, data_filename)
+    manifest_path = os.path.join(OUTPUT_DIR, f"medium-{day}.manifest.json")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    with open(data_path + ".tmp", "w", newline="", encoding="utf-8") as f:
+        # QUOTE_ALL so that empty strings stay empty strings (unquoted empty fields are NULL for COPY)
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(COPY_COLUMNS)
+        for article in articles:
+            writer.writerow([
+                article['title'],
+                article['url'],
+                article['author'],
+                article['publication_date'],
+                article['image_url'] or "",
+                article['summary'],
+                pg_array(article.get('tags', ["Tech"])),
+                article['reading_time'],
+            ])
+
+    os.replace(data_path + ".tmp", data_path)
+
+    manifest = {
+        "format": "csv",
+        "date": day,
+        "rows": len(articles),
+        "columns": COPY_COLUMNS,
+        "data": data_filename,
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    print(f"Generated {manifest_path}")
+
+def write_update(articles, target_date):
+    """Writes the update file(s) for one day in OUTPUT_FORMAT."""
+    if OUTPUT_FORMAT == "copy":
+        generate_copy(articles, target_date)
+    else:
+        generate_sql(articles, target_date)
+
+async def ingest_links(links, target_date, llm_limiter=None, parse_pool=None, scrape_limiter=None, stats=None):
+    """Scrape -> parse -> LLM pipeline over bounded queues.
+
+    Fetches run concurrently, pages are parsed in worker processes as soon as
+    they arrive and the LLM stage consumes parsed articles while later pages
+    are still downloading. The event loop itself only does I/O.
+    Limiters and the parse pool can be shared by concurrent calls (backfills).
+    """
+    if llm_limiter is None:
+        llm_limiter = AsyncRateLimiter(LLM_MAX_RPS)
+    if scrape_limiter is None:
+        scrape_limiter = AsyncRateLimiter(SCRAPE_MAX_RPS)
+    own_pool = parse_pool is None
+    if own_pool:
+        parse_pool = create_parse_pool()
+    parse_tasks = max(1, PARSE_WORKERS)
+    html_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    article_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    if stats is None:
+        stats = FetchStats()
+    articles = []
+
+    async def fetch_stage(session):
+        slots = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+        async def fetch_one(link):
+            async with slots:
+                result = await fetch_html(session, link, stats, scrape_limiter)
+            if result.ok:
+                await html_queue.put(result)
+
+        await asyncio.gather(*(fetch_one(link) for link in links))
+        cache = html_cache.get_html_cache()
+        if cache:
+            try:
+                await cache.run(cache.flush)
+            except Exception as e:
+                print(f"HTML cache commit failed: {e}")
+        for _ in range(parse_tasks):
+            await html_queue.put(None)
+
+    async def parse_worker():
+        while True:
+            result = await html_queue.get()
+            if result is None:
+                break
+            start = time.monotonic()
+            article = await parse_page(parse_pool, result.content, result.url)
+            ingest_metrics.PARSE_DURATION.observe(time.monotonic() - start)
+            if not article:
+                ingest_metrics.ARTICLES_SKIPPED.labels("unparsed").inc()
+                continue
+            # Filter phantom articles (no image AND unknown author)
+            if article['author'] == "Unknown Author" and not article['image_url']:
+                print(f"Skipping phantom: {article['title']}")
+                ingest_metrics.ARTICLES_SKIPPED.labels("phantom").inc()
+                continue
+            # Filter system articles
+            if article['title'] in SYSTEM_TITLES:
+                ingest_metrics.ARTICLES_SKIPPED.labels("system").inc()
+                continue
+            await article_queue.put(article)
+
+    async def parse_stage():
+        # One consumer per worker process keeps every process busy
+        await asyncio.gather(*(parse_worker() for _ in range(parse_tasks)))
+        for _ in range(LLM_CONCURRENCY):
+            await article_queue.put(None)
+
+    async def llm_stage():
+        while True:
+            article = await article_queue.get()
+            if article is None:
+                break
+            # Agentic extraction
+            print(f"Extracting agentic metadata for: {article['title']}...")
+            summary, tags = await agentic_metadata_extraction(article['title'], article['body_text'], llm_limiter)
+            article['summary'] = summary
+            article['tags'] = tags
+            article['publication_date'] = target_date.isoformat()
+            articles.append(article)
+
+    try:
+        async with create_session() as session:
+            tasks = [
+                asyncio.ensure_future(stage)
+                for stage in (fetch_stage(session), parse_stage(), *(llm_stage() for _ in range(LLM_CONCURRENCY)))
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # A failed stage would leave the others blocked on their queues
+                for task in tasks:
+                    task.cancel()
+                raise
+    finally:
+        if own_pool and parse_pool is not None:
+            parse_pool.shutdown()
+    stats.report()
+    cache = get_llm_cache()
+    if cache:
+        try:
+            await cache.run(cache.flush)
+        except Exception as e:
+            print(f"LLM cache commit failed: {e}")
+        print(f"LLM cache: {cache.hits} hits, {cache.misses} misses")
+    ingest_metrics.ARTICLES_INGESTED.inc(len(articles))
+    ingest_metrics.record_run(len(articles))
+    return articles
+
+async def ingest_and_write(links, target_date, llm_limiter=None, parse_pool=None):
+    """Runs the pipeline and writes the day's update, unless nothing was read (the update would empty the day)."""
+    if not links:
+        print(f"No article links for {target_date}, not writing an update.")
+        return
+    stats = FetchStats()
+    articles = await ingest_links(links, target_date, llm_limiter, parse_pool, stats=stats)
+    if not any(r.ok for r in stats.results):
+        print(f"No page fetched for {target_date}, not writing an update.")
+        return
+    write_update(articles, target_date)
+
 async def run_standardized_ingestion(target_date=None):
     if not EMAIL_USER or not EMAIL_PASS:
         print("Please set GMAIL_USER and GMAIL_PASS environment variables.")
@@ -247,43 +397,73 @@ async def run_standardized_ingestion(target_date=None):
                 print("Model failed to warm up. Exiting.")
                 return
 
-            articles = []
-            for link in links:
-                article = scrape_article(link)
-                if article:
-                    # Filter phantom articles (no image AND unknown author)
-                    if article['author'] == "Unknown Author" and not article['image_url']:
-                        print(f"Skipping phantom: {article['title']}")
-                        continue
-                        
-                    # Filter system articles
-                    if article['title'] in ["Work at Medium", "Medium Help Center"]:
-                        continue
-
-                    # Agentic extraction
-                    print(f"Extracting agentic metadata for: {article['title']}...")
-                    summary, tags = await agentic_metadata_extraction(article['title'], article['body_text'])
-                    article['summary'] = summary
-                    article['tags'] = tags
-                    article['publication_date'] = target_date.isoformat() 
-                    articles.append(article)
-                    
-                    # Small throttle
-                    await asyncio.sleep(2)
-            
-            generate_sql(articles, target_date)
+            await ingest_and_write(links, target_date)
         else:
             print(f"No newsletter found for {target_date}.")
     except Exception as e:
         print(f"Error: {e}")
 
-if __name__ == "__main__":
-    target = None
-    if len(sys.argv) > 1:
+async def run_range_ingestion(start_date, end_date):
+    """Ingests every day of [start_date, end_date] over a single IMAP session."""
+    if not EMAIL_USER or not EMAIL_PASS:
+        print("Please set GMAIL_USER and GMAIL_PASS environment variables.")
+        return
+
+    print(f"Connecting to Gmail for {start_date} -> {end_date}...")
+    try:
+        mail = connect_gmail()
+        try:
+            digests = fetch_digests(mail, start_date, end_date)
+        finally:
+            mail.logout()
+        print(f"Found digests for {len(digests)} day(s).")
+        if not digests:
+            return
+
+        if not await pre_warm_model():
+            print("Model failed to warm up. Exiting.")
+            return
+
+        llm_limiter = AsyncRateLimiter(LLM_MAX_RPS)
+        parse_pool = create_parse_pool()
         try:
-            target = datetime.datetime.strptime(sys.argv[1], "%Y-%m-%d").date()
-        except ValueError:
-            print("Invalid date format. Use YYYY-MM-DD.")
+            day = start_date
+            while day <= end_date:
+                digest = digests.get(day)
+                if digest and digest.error:
+                    print(f"\n--- {day} --- Skipped: {digest.error}")
+                elif digest:
+                    print(f"\n--- {day} --- Subject: {digest.subject}")
+                    links = digest.links()
+                    print(f"Found {len(links)} links.")
+                    await ingest_and_write(links, day, llm_limiter, parse_pool)
+                else:
+                    print(f"\n--- {day} --- No newsletter found.")
+                day += datetime.timedelta(days=1)
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+    except Exception as e:
+        print(f"Error: {e}")
+
+if __name__ == "__main__":
+    # python ingest_standardized.py [YYYY-MM-DD [YYYY-MM-DD]] [--replay]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--replay" in sys.argv:
+        # Re-parse articles from the HTML cache only, without touching the network
+        html_cache.REPLAY = True
+    try:
+        dates = [datetime.datetime.strptime(arg, "%Y-%m-%d").date() for arg in args[:2]]
+    except ValueError:
+        print("Invalid date format. Use YYYY-MM-DD.")
+        sys.exit(1)
+
+    if len(dates) == 2:
+        if dates[0] > dates[1]:
+            print("Start date must be before or equal to end date.")
             sys.exit(1)
-            
-    asyncio.run(run_standardized_ingestion(target))
+        asyncio.run(run_range_ingestion(dates[0], dates[1]))
+    else:
+        asyncio.run(run_standardized_ingestion(dates[0] if dates else None))
+    # One-shot run: leave a snapshot for the node_exporter textfile collector
+    ingest_metrics.write_snapshot("ingest")
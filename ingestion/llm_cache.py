@@ -0,0 +1,184 @@
+"""Content-addressed on-disk cache of LLM (summary, tags) results.
+
+Usage:
+    python llm_cache.py stats
+    python llm_cache.py clear
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import asyncio
+import sqlite3
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "llm_cache.sqlite3"),
+)
+LLM_CACHE_MAX_MB = float(os.environ.get("LLM_CACHE_MAX_MB", "200"))
+# Set LLM_CACHE=false to always ask the model
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE", "true").lower() == "true"
+# Writes (new results, access times) are committed in batches, like the HTML cache's
+LLM_CACHE_COMMIT_EVERY = int(os.environ.get("LLM_CACHE_COMMIT_EVERY", "32"))
+LLM_CACHE_COMMIT_SECONDS = float(os.environ.get("LLM_CACHE_COMMIT_SECONDS", "2"))
+
+
+def make_key(model, prompt_version, title, content):
+    """Same model + prompt template + input text => same key."""
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, title, content):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """sqlite-backed result store; from the event loop, call its methods through `run`."""
+
+    def __init__(self, path=LLM_CACHE_PATH, max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+                 commit_every=LLM_CACHE_COMMIT_EVERY, commit_seconds=LLM_CACHE_COMMIT_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.commit_every = commit_every
+        self.commit_seconds = commit_seconds
+        self._pending = 0
+        self._first_pending = 0.0
+        self._executor = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Used from the cache thread once the pipeline runs; `run` never overlaps two calls
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_results (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_results_last_access ON llm_results (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        row = self._conn.execute("SELECT summary, tags FROM llm_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute("UPDATE llm_results SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._written()
+        return row[0], json.loads(row[1])
+
+    def put(self, key, model, summary, tags):
+        tags_json = json.dumps(tags, ensure_ascii=False)
+        size = len(key) + len(summary.encode("utf-8")) + len(tags_json.encode("utf-8"))
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO llm_results (key, model, summary, tags, size, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, model, summary, tags_json, size, now, now),
+        )
+        self.evict()
+        self._written()
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits in 90% of max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM llm_results ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM llm_results WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        return removed
+
+    def _written(self):
+        now = time.monotonic()
+        if not self._pending:
+            self._first_pending = now
+        self._pending += 1
+        if self._pending >= self.commit_every or now - self._first_pending >= self.commit_seconds:
+            self.flush()
+
+    def flush(self):
+        """Commits the pending batch of writes."""
+        if self._pending:
+            self._conn.commit()
+            self._pending = 0
+
+    async def run(self, method, *args):
+        """Awaits `method(*args)` (e.g. cache.get) on the cache thread, off the event loop."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, method, *args)
+
+    def stats(self):
+        count, total, oldest, newest = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created_at), MAX(created_at) FROM llm_results"
+        ).fetchone()
+        per_model = dict(self._conn.execute("SELECT model, COUNT(*) FROM llm_results GROUP BY model").fetchall())
+        return {
+            "path": self.path,
+            "entries": count,
+            "size_bytes": total,
+            "max_bytes": self.max_bytes,
+            "oldest": oldest,
+            "newest": newest,
+            "per_model": per_model,
+        }
+
+    def clear(self):
+        removed = self._conn.execute("DELETE FROM llm_results").rowcount
+        self._conn.commit()
+        self._conn.execute("VACUUM")
+        return removed
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.flush()
+        self._conn.close()
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = LLMCache()
+    try:
+        if command == "stats":
+            stats = cache.stats()
+            print(f"Cache: {stats['path']}")
+            print(f"Entries: {stats['entries']}")
+            print(f"Size: {stats['size_bytes'] / 1024:.1f} KiB / {stats['max_bytes'] / 1024 / 1024:.0f} MiB")
+            for label in ("oldest", "newest"):
+                if stats[label]:
+                    print(f"{label.capitalize()}: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats[label]))}")
+            for model, count in stats["per_model"].items():
+                print(f"  {model}: {count}")
+        elif command == "clear":
+            print(f"Removed {cache.clear()} entries.")
+        else:
+            print("Usage: python llm_cache.py [stats|clear]")
+            sys.exit(1)
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from extractors import parse_article_bytes
+
+# Worker processes for HTML extraction (0 = parse in a thread of the main process)
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+if PARSE_WORKERS < 0:
+    raise ValueError(f"PARSE_WORKERS must be 0 or more, got {PARSE_WORKERS}")
+
+
+def create_parse_pool(workers=PARSE_WORKERS):
+    """Process pool for CPU-bound page parsing, or None when PARSE_WORKERS=0."""
+    if workers <= 0:
+        return None
+    # spawn: workers must not inherit the event loop, the aiohttp session or sqlite handles
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+async def parse_page(pool, content, url):
+    """Parses raw page bytes in the pool so the event loop only does I/O."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, parse_article_bytes, content, url)
@@ -0,0 +1,25 @@
+import time
+import asyncio
+
+
+class AsyncRateLimiter:
+    """Spaces calls out to at most `rate` per second; a rate of 0 disables limiting.
+
+    Shared by every task of a run, so concurrent workers draw from one budget.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                now = self._next_slot
+            self._next_slot = now + self.interval
@@ -5,6 +5,7 @@ import asyncio
 import os
 import sys
 from ingest_standardized import run_standardized_ingestion
+from ingest_metrics import serve_metrics
 
 # Configuration
 SCHEDULE_TIME = os.environ.get("SCHEDULE_TIME", "08:30")
@@ -21,6 +22,7 @@ def job():
 
 def main():
     print(f"Starting Medium Ingestion Scheduler. Frequency: Daily at {SCHEDULE_TIME}")
+    serve_metrics()
     
     if RUN_ON_STARTUP:
         print("Running initial ingestion on startup...")
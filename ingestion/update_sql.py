@@ -0,0 +1,71 @@
+import os
+
+# Same switch as the dbupdater's: diff mode rewrites only the articles that changed and deletes
+# the ones gone from the digest; otherwise the whole day is deleted and reinserted
+UPDATER_DIFF_MODE = os.environ.get("UPDATER_DIFF_MODE", "true").lower() == "true"
+
+UPSERT = """
+INSERT INTO articles (title, url, author, publication_date, image_url, summary, tags, reading_time)
+VALUES ({title}, {url}, {author}, {publication_date}, {image_url}, {summary}, {tags}, {reading_time})
+ON CONFLICT (url) DO UPDATE SET
+    title = EXCLUDED.title,
+    author = EXCLUDED.author,
+    publication_date = EXCLUDED.publication_date,
+    image_url = EXCLUDED.image_url,
+    summary = EXCLUDED.summary,
+    tags = EXCLUDED.tags,
+    reading_time = EXCLUDED.reading_time"""
+
+# Unchanged articles are not rewritten, so re-applying the same day leaves their rows alone
+UNCHANGED_GUARD = """
+WHERE (articles.title, articles.author, articles.publication_date, articles.image_url,
+       articles.summary, articles.tags, articles.reading_time)
+   IS DISTINCT FROM
+      (EXCLUDED.title, EXCLUDED.author, EXCLUDED.publication_date, EXCLUDED.image_url,
+       EXCLUDED.summary, EXCLUDED.tags, EXCLUDED.reading_time)"""
+
+
+def literal(value):
+    return "'" + (value or "").replace("'", "''") + "'"
+
+
+def tags_literal(tags):
+    return literal("{" + ",".join('"' + t.replace("\\", "\\\\").replace('"', '\\"') + '"' for t in tags) + "}")
+
+
+def article_upsert(article, diff=UPDATER_DIFF_MODE):
+    sql = UPSERT.format(
+        title=literal(article['title']),
+        url=literal(article['url']),
+        author=literal(article['author']),
+        publication_date=literal(article['publication_date']),
+        image_url=literal(article['image_url']),
+        summary=literal(article['summary']),
+        tags=tags_literal(article.get('tags') or ["Tech"]),
+        reading_time=literal(article['reading_time']),
+    )
+    return sql + (UNCHANGED_GUARD if diff else "") + ";\n"
+
+
+def update_statements(articles, day, diff=UPDATER_DIFF_MODE):
+    """SQL replacing the articles of `day` (YYYY-MM-DD) with `articles`."""
+    if not diff:
+        yield f"DELETE FROM articles WHERE publication_date = {literal(day)};\n"
+    for article in articles:
+        yield article_upsert(article, diff)
+    if diff:
+        # Then drop the day's articles that are no longer in the digest
+        if articles:
+            urls = ", ".join(literal(article['url']) for article in articles)
+            yield f"DELETE FROM articles WHERE publication_date = {literal(day)} AND url NOT IN ({urls});\n"
+        else:
+            yield f"DELETE FROM articles WHERE publication_date = {literal(day)};\n"
+
+
+def write_sql_update(filepath, articles, day, diff=UPDATER_DIFF_MODE):
+    """Writes the update under a temporary name and renames it into place, so the updater never sees a partial file."""
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, "w") as f:
+        for statement in update_statements(articles, day, diff):
+            f.write(statement)
+    os.replace(tmp_path, filepath)
@@ -1,16 +1,189 @@
+"""Archives processed update files into one append-only archive per month.
+
+Each file becomes an independently compressed member (a zstd frame, or a gzip
+member when the zstandard package is not installed) appended to
+archive/medium-YYYY-MM.zst (or .gz). A sidecar medium-YYYY-MM.index.json maps
+each member to its offset and length, so restoring one day only reads that
+day's bytes. Later runs append to the month instead of rewriting it, and files
+are streamed through the compressor without being loaded into memory.
+
+The archive remains a valid stream for the command line tools: `zstd -dc` or
+`zcat` prints every member in order.
+
+Usage:
+    python scripts/archive_processed.py [archive]
+    python scripts/archive_processed.py restore YYYY-MM-DD [--output DIR]
+"""
 import os
-import tarfile
 import re
-import shutil
+import sys
+import json
+import zlib
+import hashlib
+import tarfile
+import argparse
+import datetime
 from collections import defaultdict
 
-def archive_processed_files():
-    processed_dir = "processed"
-    archive_dir = os.path.join(processed_dir, "archive")
-    
-    # regex to match medium-YYYY-MM-DD.sql
-    file_pattern = re.compile(r"medium-(\d{4}-\d{2})-\d{2}\.sql$")
-    
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+PROCESSED_DIR = os.environ.get("PROCESSED_DIR", "processed")
+ARCHIVE_DIR = os.path.join(PROCESSED_DIR, "archive")
+ARCHIVE_ZSTD_LEVEL = int(os.environ.get("ARCHIVE_ZSTD_LEVEL", "10"))
+
+CHUNK_SIZE = 1 << 20
+
+# medium-YYYY-MM-DD.sql, and the .csv + .manifest.json of bulk updates
+FILE_PATTERN = re.compile(r"^medium-((\d{4}-\d{2})-\d{2})(\.sql|\.csv|\.manifest\.json)$")
+
+
+class Codec:
+    """Streaming compression of one archive member."""
+
+    def __init__(self, name, extension, compressor, decompressor):
+        self.name = name
+        self.extension = extension
+        self.compressor = compressor
+        self.decompressor = decompressor
+
+
+def _zstd_codec():
+    return Codec(
+        "zstd", ".zst",
+        lambda: zstandard.ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL).compressobj(),
+        lambda: zstandard.ZstdDecompressor().decompressobj(),
+    )
+
+
+def _gzip_codec():
+    # wbits=31 writes and reads gzip framing
+    return Codec(
+        "gzip", ".gz",
+        lambda: zlib.compressobj(9, zlib.DEFLATED, 31),
+        lambda: zlib.decompressobj(31),
+    )
+
+
+def get_codec(name=None):
+    """The named codec, or zstd when available with gzip as the fallback."""
+    if name is None:
+        name = "zstd" if HAS_ZSTD else "gzip"
+    if name == "zstd":
+        if not HAS_ZSTD:
+            raise RuntimeError("this archive uses zstd; install the zstandard package to read it")
+        return _zstd_codec()
+    return _gzip_codec()
+
+
+class MonthArchive:
+    """The archive file and sidecar index of one month."""
+
+    def __init__(self, archive_dir, month):
+        self.index_path = os.path.join(archive_dir, f"medium-{month}.index.json")
+        self.month = month
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+        else:
+            self.index = {"month": month, "codec": get_codec().name, "members": {}}
+        self.codec = get_codec(self.index["codec"])
+        self.path = os.path.join(archive_dir, f"medium-{month}{self.codec.extension}")
+
+    def exists(self):
+        return os.path.exists(self.index_path)
+
+    def end_offset(self):
+        """End of the last indexed member; anything after it was left by an interrupted run."""
+        return max((m["offset"] + m["length"] for m in self.index["members"].values()), default=0)
+
+    def existing_archives(self):
+        return [path for path in (os.path.splitext(self.path)[0] + ext for ext in (".zst", ".gz"))
+                if os.path.exists(path)]
+
+    def add(self, paths):
+        """Appends files as new members (a newer copy of a name replaces it in the index), then saves the index.
+
+        Raises ValueError rather than touch an archive whose index is missing or does not
+        match it: member names live only in the index, so it cannot be rebuilt from the data.
+        """
+        end = self.end_offset()
+        if not self.exists():
+            orphans = [path for path in self.existing_archives() if os.path.getsize(path)]
+            if orphans:
+                raise ValueError(f"{orphans[0]} exists without its index {self.index_path}; "
+                                 "restore the index or move the archive aside")
+        elif os.path.exists(self.path) and os.path.getsize(self.path) < end:
+            raise ValueError(f"{self.path} is shorter than its index says ({end} bytes)")
+        with open(self.path, "ab") as out:
+            out.truncate(end)
+            out.seek(0, os.SEEK_END)
+            for path in paths:
+                self.index["members"][os.path.basename(path)] = self._append(out, path)
+            out.flush()
+            os.fsync(out.fileno())
+        self.save_index()
+
+    def _append(self, out, path):
+        offset = out.tell()
+        compressor = self.codec.compressor()
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as src:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                size += len(chunk)
+                digest.update(chunk)
+                out.write(compressor.compress(chunk))
+        out.write(compressor.flush())
+        return {
+            "offset": offset,
+            "length": out.tell() - offset,
+            "size": size,
+            "sha256": digest.hexdigest(),
+            "archived_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def members_for(self, day):
+        return sorted(name for name in self.index["members"] if name.startswith(f"medium-{day}."))
+
+    def extract(self, name, output_dir):
+        """Seeks to one member and streams it back out, checking its size and hash."""
+        entry = self.index["members"][name]
+        decompressor = self.codec.decompressor()
+        digest = hashlib.sha256()
+        size = 0
+        target = os.path.join(output_dir, name)
+        with open(self.path, "rb") as src, open(target + ".tmp", "wb") as out:
+            src.seek(entry["offset"])
+            remaining = entry["length"]
+            while remaining:
+                chunk = src.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise ValueError(f"{self.path} is truncated inside {name}")
+                remaining -= len(chunk)
+                data = decompressor.decompress(chunk)
+                size += len(data)
+                digest.update(data)
+                out.write(data)
+        if size != entry["size"] or digest.hexdigest() != entry["sha256"]:
+            os.remove(target + ".tmp")
+            raise ValueError(f"{name} does not match its index entry")
+        os.replace(target + ".tmp", target)
+        return target
+
+
+def archive_processed_files(processed_dir=PROCESSED_DIR, archive_dir=None):
+    archive_dir = archive_dir or os.path.join(processed_dir, "archive")
+
     if not os.path.exists(processed_dir):
         print(f"Directory {processed_dir} not found.")
         return
@@ -21,41 +194,88 @@ def archive_processed_files():
 
     # Group files by YYYY-MM
     monthly_groups = defaultdict(list)
-    files = [f for f in os.listdir(processed_dir) if os.path.isfile(os.path.join(processed_dir, f))]
-    
-    for filename in files:
-        match = file_pattern.match(filename)
-        if match:
-            month_key = match.group(1) # YYYY-MM
-            monthly_groups[month_key].append(filename)
+    for filename in sorted(os.listdir(processed_dir)):
+        match = FILE_PATTERN.match(filename)
+        if match and os.path.isfile(os.path.join(processed_dir, filename)):
+            monthly_groups[match.group(2)].append(filename)
 
     if not monthly_groups:
         print("No files to archive.")
         return
 
-    for month, file_list in monthly_groups.items():
-        archive_name = f"medium-{month}.tar.gz"
-        archive_path = os.path.join(archive_dir, archive_name)
-        
-        print(f"Archiving {len(file_list)} files for {month} into {archive_name}...")
-        
+    for month, file_list in sorted(monthly_groups.items()):
+        archive = MonthArchive(archive_dir, month)
+        action = "Appending" if archive.exists() else "Archiving"
+        print(f"{action} {len(file_list)} files for {month} to {os.path.basename(archive.path)} ({archive.codec.name})...")
+
         try:
-            with tarfile.open(archive_path, "w:gz") as tar:
-                for filename in file_list:
-                    file_path = os.path.join(processed_dir, filename)
-                    tar.add(file_path, arcname=filename)
-            
-            print(f"Successfully created {archive_name}. Deleting original files...")
-            
+            archive.add([os.path.join(processed_dir, filename) for filename in file_list])
+            # Originals are only removed once the index pointing at them is saved
             for filename in file_list:
                 os.remove(os.path.join(processed_dir, filename))
-                
         except Exception as e:
             print(f"Error archiving {month}: {e}")
 
+
+def restore_legacy(archive_dir, day, output_dir):
+    """Extracts a day from a medium-YYYY-MM.tar.gz written by earlier versions of this script."""
+    legacy_path = os.path.join(archive_dir, f"medium-{day[:7]}.tar.gz")
+    if not os.path.exists(legacy_path):
+        return []
+    restored = []
+    with tarfile.open(legacy_path, "r:gz") as tar:
+        for member in tar.getmembers():
+            if member.isfile() and member.name.startswith(f"medium-{day}."):
+                # "data" rejects absolute paths, ".." and links pointing outside output_dir
+                tar.extract(member, output_dir, filter="data")
+                restored.append(os.path.join(output_dir, member.name))
+    return restored
+
+
+def restore_day(day, output_dir=PROCESSED_DIR, archive_dir=None):
+    """Restores every archived file of a day into output_dir. Returns the restored paths."""
+    archive_dir = archive_dir or os.path.join(PROCESSED_DIR, "archive")
+    os.makedirs(output_dir, exist_ok=True)
+    archive = MonthArchive(archive_dir, day[:7])
+    names = archive.members_for(day) if archive.exists() else []
+    if not names:
+        return restore_legacy(archive_dir, day, output_dir)
+    return [archive.extract(name, output_dir) for name in names]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive processed update files, or restore one day")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("archive", help="archive processed files (default)")
+    restore = commands.add_parser("restore", help="restore the files of one day")
+    restore.add_argument("date", help="YYYY-MM-DD")
+    restore.add_argument("--output", default=PROCESSED_DIR, help=f"directory to restore into (default: {PROCESSED_DIR})")
+    args = parser.parse_args()
+
+    if args.command == "restore":
+        try:
+            datetime.datetime.strptime(args.date, "%Y-%m-%d")
+        except ValueError:
+            print("Invalid date format. Use YYYY-MM-DD.")
+            sys.exit(1)
+        try:
+            restored = restore_day(args.date, args.output)
+        except (ValueError, tarfile.TarError) as e:
+            print(f"Could not restore {args.date}: {e}")
+            sys.exit(1)
+        if not restored:
+            print(f"No archived files found for {args.date}.")
+            sys.exit(1)
+        for path in restored:
+            print(f"Restored {path}")
+        return
+
+    archive_processed_files()
+
+
 if __name__ == "__main__":
     # Change CWD to the project root if the script is run from 'scripts'
     if os.path.basename(os.getcwd()) == "scripts":
         os.chdir("..")
-    
-    archive_processed_files()
+
+    main()
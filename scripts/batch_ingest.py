@@ -1,21 +1,186 @@
+"""Backfills a range of Medium digests in-process.
+
+Every digest of the range is retrieved over one IMAP session, then days are
+ingested BACKFILL_WORKERS at a time. All days share one parse pool and the
+global scrape (SCRAPE_MAX_RPS) and LLM (LLM_MAX_RPS) rate limiters.
+Progress is checkpointed after each day, so rerunning the same command after
+a crash only processes the days that are not done yet.
+
+Usage:
+    python scripts/batch_ingest.py YYYY-MM-DD YYYY-MM-DD [--workers N] [--restart] [--replay]
+"""
+import os
 import sys
-import datetime
-import subprocess
+import json
 import time
-import os
+import asyncio
+import argparse
+import datetime
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python batch_ingest.py YYYY-MM-DD YYYY-MM-DD")
-        print("Example: python batch_ingest.py 2025-11-11 2025-11-22")
-        sys.exit(1)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "ingestion"))
+
+import html_cache
+import ingest_metrics
+import ingest_standardized as ingestion
+from fetcher import FetchStats, SCRAPE_MAX_RPS
+from imap_digests import fetch_digests, DigestFetchError
+from parse_pool import create_parse_pool
+from ratelimit import AsyncRateLimiter
+
+BACKFILL_WORKERS = int(os.environ.get("BACKFILL_WORKERS", "2"))
+BACKFILL_CHECKPOINT = os.environ.get("BACKFILL_CHECKPOINT", os.path.join(ROOT_DIR, "cache", "backfill_checkpoint.json"))
+
+# Days in these states are skipped when resuming
+FINISHED = ("done", "no digest")
+
+
+class Checkpoint:
+    """Per-day progress, rewritten atomically after every day."""
+
+    def __init__(self, path):
+        self.path = path
+        self.days = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.days = json.load(f).get("days", {})
+
+    def is_finished(self, day):
+        return self.days.get(day.isoformat(), {}).get("status") in FINISHED
+
+    def record(self, day, **entry):
+        entry["updated_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+        self.days[day.isoformat()] = entry
+        self.save()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"days": self.days}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def date_range(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += datetime.timedelta(days=1)
 
-    start_date_str = sys.argv[1]
-    end_date_str = sys.argv[2]
 
+async def ingest_day(day, digest, shared, checkpoint):
+    start = time.monotonic()
+    if digest is None:
+        print(f"[{day}] No newsletter found.")
+        checkpoint.record(day, status="no digest", elapsed=0.0)
+        return
+    if digest.error:
+        print(f"[{day}] Failed: {digest.error}")
+        checkpoint.record(day, status="failed", error=digest.error, elapsed=0.0)
+        return
+    links = digest.links()
+    print(f"[{day}] {digest.subject}: {len(links)} links")
+    stats = FetchStats()
     try:
-        start_date = datetime.datetime.strptime(start_date_str, "%Y-%m-%d").date()
-        end_date = datetime.datetime.strptime(end_date_str, "%Y-%m-%d").date()
+        # An update replaces the whole day, so an empty result is an error, never "done"
+        if not links:
+            raise RuntimeError("no article links in the digest")
+        articles = await ingestion.ingest_links(
+            links, day, shared["llm_limiter"], shared["parse_pool"], shared["scrape_limiter"], stats
+        )
+        fetched = sum(1 for r in stats.results if r.ok)
+        if not fetched:
+            raise RuntimeError(f"none of the {len(links)} pages could be fetched")
+        ingestion.write_update(articles, day)
+        checkpoint.record(
+            day, status="done", links=len(links), fetched=fetched,
+            articles=len(articles), elapsed=round(time.monotonic() - start, 1),
+        )
+    except Exception as e:
+        print(f"[{day}] Failed: {e}")
+        checkpoint.record(day, status="failed", error=str(e), links=len(links),
+                          elapsed=round(time.monotonic() - start, 1))
+
+
+async def run_backfill(start_date, end_date, workers, checkpoint):
+    pending = [day for day in date_range(start_date, end_date) if not checkpoint.is_finished(day)]
+    skipped = (end_date - start_date).days + 1 - len(pending)
+    if skipped:
+        print(f"Resuming: {skipped} day(s) already finished according to {checkpoint.path}")
+    if not pending:
+        return
+
+    if not ingestion.EMAIL_USER or not ingestion.EMAIL_PASS:
+        raise RuntimeError("Please set GMAIL_USER and GMAIL_PASS environment variables.")
+    mail = ingestion.connect_gmail()
+    try:
+        digests = fetch_digests(mail, pending[0], pending[-1])
+    except DigestFetchError as e:
+        # Not "no digest": these days have to be retried
+        print(f"Could not read the digests: {e}")
+        for day in pending:
+            checkpoint.record(day, status="failed", error=str(e), elapsed=0.0)
+        return
+    finally:
+        mail.logout()
+    print(f"Found digests for {len(digests)} of {len(pending)} pending day(s).")
+
+    if digests and not await ingestion.pre_warm_model():
+        raise RuntimeError("Model failed to warm up.")
+
+    shared = {
+        "llm_limiter": AsyncRateLimiter(ingestion.LLM_MAX_RPS),
+        "scrape_limiter": AsyncRateLimiter(SCRAPE_MAX_RPS),
+        "parse_pool": create_parse_pool(),
+    }
+    slots = asyncio.Semaphore(max(1, workers))
+
+    async def worker(day):
+        async with slots:
+            await ingest_day(day, digests.get(day), shared, checkpoint)
+
+    try:
+        await asyncio.gather(*(worker(day) for day in pending))
+    finally:
+        if shared["parse_pool"] is not None:
+            shared["parse_pool"].shutdown()
+
+
+def report(checkpoint, start_date, end_date):
+    """Prints per-day status and timings; returns the number of failed or missing days."""
+    print("\nBackfill report")
+    print(f"{'day':<12}{'status':<12}{'links':>7}{'fetched':>9}{'articles':>10}{'time':>9}")
+    problems = 0
+    totals = {"links": 0, "fetched": 0, "articles": 0, "elapsed": 0.0}
+    for day in date_range(start_date, end_date):
+        entry = checkpoint.days.get(day.isoformat(), {"status": "not run"})
+        if entry["status"] not in FINISHED:
+            problems += 1
+        for key in totals:
+            totals[key] += entry.get(key, 0)
+        print(f"{day.isoformat():<12}{entry['status']:<12}{entry.get('links', '-'):>7}"
+              f"{entry.get('fetched', '-'):>9}{entry.get('articles', '-'):>10}{entry.get('elapsed', 0):>8.1f}s")
+        if entry.get("error"):
+            print(f"{'':<12}{entry['error']}")
+    print(f"{'total':<24}{totals['links']:>7}{totals['fetched']:>9}{totals['articles']:>10}{totals['elapsed']:>8.1f}s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill Medium digests for a date range")
+    parser.add_argument("start", help="YYYY-MM-DD")
+    parser.add_argument("end", help="YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="days processed in parallel")
+    parser.add_argument("--checkpoint", default=BACKFILL_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and redo every day")
+    parser.add_argument("--replay", action="store_true", help="serve pages from the HTML cache only")
+    args = parser.parse_args()
+
+    try:
+        start_date = datetime.datetime.strptime(args.start, "%Y-%m-%d").date()
+        end_date = datetime.datetime.strptime(args.end, "%Y-%m-%d").date()
     except ValueError:
         print("Invalid date format. Use YYYY-MM-DD.")
         sys.exit(1)
@@ -24,56 +189,24 @@ def main():
         print("Start date must be before or equal to end date.")
         sys.exit(1)
 
-    current_date = start_date
-    
-    # Path to ingest_medium.py - assuming we run this from project root or scripts dir
-    # Let's assume we run from project root for now, or handle relative paths
-    script_path = os.path.join("ingestion", "ingest_medium.py")
-    if not os.path.exists(script_path):
-        # Try running from scripts dir context
-        script_path = os.path.join("..", "ingestion", "ingest_medium.py")
-        if not os.path.exists(script_path):
-             print("Could not find ingest_medium.py")
-             sys.exit(1)
-
-    print(f"Starting batch ingestion from {start_date} to {end_date}...")
-
-    # We will run the command from the 'ingestion' directory so that relative paths in ingest_medium.py work as expected
-    ingestion_dir = os.path.join(os.getcwd(), "ingestion")
-    
-    if not os.path.exists(ingestion_dir):
-        print(f"Could not find ingestion directory at {ingestion_dir}")
-        sys.exit(1)
+    if args.replay:
+        html_cache.REPLAY = True
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart:
+        for day in date_range(start_date, end_date):
+            checkpoint.days.pop(day.isoformat(), None)
+
+    print(f"Starting batch ingestion from {start_date} to {end_date} ({args.workers} workers)...")
+    started = time.monotonic()
+    try:
+        asyncio.run(run_backfill(start_date, end_date, args.workers, checkpoint))
+    except Exception as e:
+        print(f"Backfill stopped: {e}")
+    problems = report(checkpoint, start_date, end_date)
+    ingest_metrics.write_snapshot("backfill")
+    print(f"\nBatch ingestion completed in {time.monotonic() - started:.1f}s, {problems} day(s) to retry.")
+    sys.exit(1 if problems else 0)
 
-    while current_date <= end_date:
-        date_str = current_date.strftime("%Y-%m-%d")
-        print(f"\n--- Processing {date_str} ---")
-        
-        # Executable and script relative to ingestion_dir
-        python_executable = "venv/bin/python"
-        script_name = "ingest_medium.py"
-
-        cmd = [python_executable, script_name, date_str]
-        
-        try:
-            # Run from ingestion dir
-            result = subprocess.run(cmd, cwd=ingestion_dir, capture_output=True, text=True)
-            print(result.stdout)
-            if result.returncode != 0:
-                print(f"Error processing {date_str}:")
-                print(result.stderr)
-            else:
-                print(f"Successfully processed {date_str}")
-        except Exception as e:
-            print(f"Failed to execute script for {date_str}: {e}")
-
-        current_date += datetime.timedelta(days=1)
-        
-        if current_date <= end_date:
-            print("Waiting 10 seconds before next day to avoid rate limits...")
-            time.sleep(10)
-
-    print("\nBatch ingestion completed.")
 
 if __name__ == "__main__":
     main()
@@ -1,70 +1,25 @@
 import os
-import time
-import shutil
-import psycopg2
-from psycopg2 import sql
+import sys
 
-UPDATES_DIR = "updates"
-PROCESSED_DIR = "processed"
-DB_URL = os.environ.get("DATABASE_URL")
+# Same apply logic as the dbupdater container, run once against local directories
+os.environ.setdefault("UPDATES_DIR", "updates")
+os.environ.setdefault("PROCESSED_DIR", "processed")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dbupdater"))
 
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(DB_URL)
-        return conn
-    except Exception as e:
-        print(f"Error connecting to database: {e}")
-        return None
-
-def process_files():
-    if not os.path.exists(UPDATES_DIR):
-        print(f"Directory {UPDATES_DIR} does not exist.")
-        return
-
-    files = [f for f in os.listdir(UPDATES_DIR) if f.endswith(".sql")]
-    if not files:
-        print("No .sql files found in updates directory.")
-        return
-
-    conn = get_db_connection()
-    if not conn:
-        return
-
-    try:
-        cursor = conn.cursor()
-        for filename in files:
-            filepath = os.path.join(UPDATES_DIR, filename)
-            print(f"Processing {filename}...")
-            
-            try:
-                with open(filepath, "r") as f:
-                    sql_content = f.read()
-                
-                cursor.execute(sql_content)
-                conn.commit()
-                print(f"Successfully executed {filename}")
-                
-                # Move to processed
-                os.makedirs(PROCESSED_DIR, exist_ok=True)
-                shutil.move(filepath, os.path.join(PROCESSED_DIR, filename))
-                print(f"Moved {filename} to {PROCESSED_DIR}")
-                
-            except Exception as e:
-                conn.rollback()
-                print(f"Error processing {filename}: {e}")
-                os.makedirs(PROCESSED_DIR, exist_ok=True)
-                shutil.move(filepath, os.path.join(PROCESSED_DIR, filename + ".failed"))
-                print(f"Moved failed file {filename} to {PROCESSED_DIR} with .failed extension")
-
-        cursor.close()
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-    finally:
-        conn.close()
+import updater
+import updater_metrics
 
 def main():
     print("Starting Local DB Updater...")
-    process_files()
+    os.makedirs(updater.PROCESSED_DIR, exist_ok=True)
+    if os.path.exists(updater.UPDATES_DIR) and not updater.list_updates():
+        print("No update files found in updates directory.")
+        return
+    # The ledger of applied updates lives in a migration
+    if not updater.run_migrations():
+        return
+    updater.process_files()
+    updater_metrics.write_snapshot("local_updater")
 
 if __name__ == "__main__":
     main()
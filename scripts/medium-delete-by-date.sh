@@ -14,10 +14,10 @@ DB_NAME="medium_db"
 # Let's assume project root for simplicity as requested "./scripts/..."
 PROCESSED_DIR="./processed"
 
-# Delete from DB
+# Delete from DB, and from the ledger so the same file can be applied again
 echo "Deleting articles for date $DATE from database..."
 if docker ps | grep -q $DB_CONTAINER; then
-    docker exec $DB_CONTAINER psql -U $DB_USER -d $DB_NAME -c "DELETE FROM articles WHERE publication_date = '$DATE';"
+    docker exec $DB_CONTAINER psql -U $DB_USER -d $DB_NAME -c "DELETE FROM articles WHERE publication_date = '$DATE';" -c "DELETE FROM applied_updates WHERE target_date = '$DATE';" -c "UPDATE data_version SET version = version + 1, updated_at = now();"
 else
     echo "Error: Container $DB_CONTAINER is not running."
     exit 1
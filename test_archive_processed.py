@@ -0,0 +1,114 @@
+import os
+import sys
+import io
+import gzip
+import tarfile
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+import archive_processed
+from archive_processed import MonthArchive, archive_processed_files, restore_day
+
+class TestArchiveProcessed(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.processed = os.path.join(self.tmp.name, "processed")
+        self.archive_dir = os.path.join(self.processed, "archive")
+        self.restored = os.path.join(self.tmp.name, "restored")
+        os.makedirs(self.processed)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        with open(os.path.join(self.processed, name), "w") as f:
+            f.write(content)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def run_archive(self):
+        archive_processed_files(self.processed, self.archive_dir)
+
+    def check_append_and_restore(self):
+        self.write("medium-2025-11-01.sql", "day one\n" * 1000)
+        self.write("medium-2025-11-02.csv", "title,url\nb,https://b\n")
+        self.write("medium-2025-11-02.manifest.json", '{"rows": 1}')
+        self.write("notes.txt", "not an update")
+        self.run_archive()
+        self.assertEqual(sorted(os.listdir(self.processed)), ["archive", "notes.txt"])
+
+        # A second run appends to the month instead of replacing it
+        self.write("medium-2025-11-03.sql", "day three\n")
+        self.run_archive()
+
+        restored = restore_day("2025-11-02", self.restored, self.archive_dir)
+        self.assertEqual([os.path.basename(p) for p in restored],
+                         ["medium-2025-11-02.csv", "medium-2025-11-02.manifest.json"])
+        self.assertEqual(self.read(restored[0]), "title,url\nb,https://b\n")
+        self.assertEqual(self.read(restore_day("2025-11-01", self.restored, self.archive_dir)[0]), "day one\n" * 1000)
+        self.assertEqual(self.read(restore_day("2025-11-03", self.restored, self.archive_dir)[0]), "day three\n")
+        self.assertEqual(restore_day("2025-11-04", self.restored, self.archive_dir), [])
+
+    def test_zstd_archive(self):
+        if not archive_processed.HAS_ZSTD:
+            self.skipTest("zstandard is not installed")
+        self.check_append_and_restore()
+        self.assertTrue(os.path.exists(os.path.join(self.archive_dir, "medium-2025-11.zst")))
+
+    def test_gzip_fallback_is_a_valid_gzip_stream(self):
+        has_zstd = archive_processed.HAS_ZSTD
+        archive_processed.HAS_ZSTD = False
+        try:
+            self.check_append_and_restore()
+        finally:
+            archive_processed.HAS_ZSTD = has_zstd
+        with gzip.open(os.path.join(self.archive_dir, "medium-2025-11.gz"), "rt") as f:
+            self.assertTrue(f.read().endswith("day three\n"))
+
+    def test_interrupted_append_is_discarded(self):
+        self.write("medium-2025-11-01.sql", "day one\n")
+        self.run_archive()
+        archive = MonthArchive(self.archive_dir, "2025-11")
+        with open(archive.path, "ab") as f:
+            f.write(b"partial member")
+        self.write("medium-2025-11-02.sql", "day two\n")
+        self.run_archive()
+        self.assertEqual(self.read(restore_day("2025-11-02", self.restored, self.archive_dir)[0]), "day two\n")
+        self.assertEqual(os.path.getsize(archive.path), MonthArchive(self.archive_dir, "2025-11").end_offset())
+
+    def test_archive_without_its_index_is_left_alone(self):
+        self.write("medium-2025-11-01.sql", "day one\n")
+        self.run_archive()
+        archive = MonthArchive(self.archive_dir, "2025-11")
+        size = os.path.getsize(archive.path)
+        os.remove(archive.index_path)
+        self.write("medium-2025-11-02.sql", "day two\n")
+        self.run_archive()
+        self.assertEqual(os.path.getsize(archive.path), size)
+        # The new file is kept for a later run
+        self.assertIn("medium-2025-11-02.sql", os.listdir(self.processed))
+
+    def legacy_archive(self, members):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with tarfile.open(os.path.join(self.archive_dir, "medium-2025-10.tar.gz"), "w:gz") as tar:
+            for name, content in members:
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+
+    def test_legacy_tar_restore(self):
+        self.legacy_archive([("medium-2025-10-01.sql", b"legacy\n")])
+        self.assertEqual(self.read(restore_day("2025-10-01", self.restored, self.archive_dir)[0]), "legacy\n")
+
+    def test_legacy_tar_cannot_write_outside_the_output(self):
+        self.legacy_archive([("medium-2025-10-01./../../escaped.sql", b"evil\n")])
+        with self.assertRaises(tarfile.FilterError):
+            restore_day("2025-10-01", self.restored, self.archive_dir)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "escaped.sql")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import asyncio
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestion"))
+
+import extractors
+import parse_pool
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestion", "benchmarks", "fixtures")
+
+PAGE = """<html><head><title>Fallback title</title>
+<meta property="og:title" content="Fast &amp; Furious Parsing">
+<meta name="author" content="Jane Doe">
+<meta property="article:tag" content="Python"><meta property="article:tag" content="Performance">
+<style>p { color: red }</style></head>
+<body><h1>Fast parsing</h1><p>Intro <b>bold</b> text<script>var x = 1;</script> after</p>
+<ul><li>one<ul><li>nested</li></ul></li></ul><span>7 min read</span></body></html>"""
+
+
+@unittest.skipUnless(extractors.HAS_LXML, "lxml is not installed")
+class TestExtractors(unittest.TestCase):
+    def test_backends_agree_on_snippet(self):
+        self.assertEqual(extractors.extract_page(PAGE, "lxml"), extractors.extract_page(PAGE, "bs4"))
+
+    def test_fields(self):
+        page = extractors.extract_page(PAGE, "lxml")
+        self.assertEqual(page["title"], "Fast & Furious Parsing")
+        self.assertEqual(page["author"], "Jane Doe")
+        self.assertEqual(page["description"], "")
+        self.assertIsNone(page["image_url"])
+        self.assertEqual(page["reading_time"], "7 min read")
+        self.assertEqual(page["article_tags"], ["Python", "Performance"])
+        self.assertNotIn("var x", page["body_text"])
+
+    def test_title_falls_back_to_title_tag(self):
+        html = "<html><head><title>Only title</title></head><body><p>x</p></body></html>"
+        self.assertEqual(extractors.extract_page(html, "lxml")["title"], "Only title")
+        self.assertEqual(extractors.extract_page(html, "bs4")["title"], "Only title")
+
+    def test_parse_article_bytes(self):
+        article = extractors.parse_article_bytes(PAGE.encode("utf-8"), "https://medium.com/@jane/post-1")
+        self.assertEqual(article["url"], "https://medium.com/@jane/post-1")
+        self.assertEqual(article["title"], "Fast & Furious Parsing")
+        self.assertEqual(
+            sorted(article), ["author", "body_text", "image_url", "reading_time", "title", "url"]
+        )
+
+    def test_parse_in_worker_process(self):
+        pool = parse_pool.create_parse_pool(1)
+        try:
+            article = asyncio.run(parse_pool.parse_page(pool, PAGE.encode("utf-8"), "https://medium.com/@jane/post-1"))
+        finally:
+            pool.shutdown()
+        self.assertEqual(article, extractors.parse_article_bytes(PAGE.encode("utf-8"), "https://medium.com/@jane/post-1"))
+
+    def test_backends_agree_on_fixtures(self):
+        for name in sorted(os.listdir(FIXTURES_DIR)):
+            with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+                html = f.read()
+            with self.subTest(fixture=name):
+                if name.startswith("digest"):
+                    links = extractors.extract_digest_links(html, "lxml")
+                    self.assertEqual(links, extractors.extract_digest_links(html, "bs4"))
+                    self.assertEqual(len(links), 20)
+                else:
+                    self.assertEqual(extractors.extract_page(html, "lxml"), extractors.extract_page(html, "bs4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestion"))
+
+from html_cache import HTMLCache, canonical_url
+
+class TestHTMLCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HTMLCache(os.path.join(self.tmp.name, "html_cache.sqlite3"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_canonical_url_drops_tracking(self):
+        self.assertEqual(
+            canonical_url("https://Medium.com/@bob/some-post-4d44/?source=email-digest.reader#top"),
+            "https://medium.com/@bob/some-post-4d44",
+        )
+
+    def test_same_article_from_two_digests_shares_an_entry(self):
+        self.cache.put("https://medium.com/@bob/post-1?source=digest-a", "<html>é</html>", '"abc"', None)
+        page = self.cache.get("https://medium.com/@bob/post-1?source=digest-b")
+        self.assertEqual(page.html, "<html>é</html>")
+        self.assertEqual(page.conditional_headers(), {"If-None-Match": '"abc"'})
+
+    def test_compressed_storage(self):
+        html = "<p>" + "Medium article body. " * 500 + "</p>"
+        self.cache.put("https://medium.com/@bob/post-2", html, None, "Fri, 21 Nov 2025 08:00:00 GMT")
+        stats = self.cache.stats()
+        self.assertEqual(stats["raw_bytes"], len(html))
+        self.assertLess(stats["stored_bytes"], len(html) / 10)
+        self.assertEqual(
+            self.cache.get("https://medium.com/@bob/post-2").conditional_headers(),
+            {"If-Modified-Since": "Fri, 21 Nov 2025 08:00:00 GMT"},
+        )
+
+    def test_missing_page(self):
+        self.assertIsNone(self.cache.get("https://medium.com/@bob/unknown"))
+
+    def test_writes_are_committed_in_batches(self):
+        cache = HTMLCache(os.path.join(self.tmp.name, "batched.sqlite3"), commit_every=3, commit_seconds=3600)
+        reader = sqlite3.connect(cache.path)
+        try:
+            count = lambda: reader.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            cache.put("https://medium.com/@bob/a", "<html>a</html>")
+            cache.put("https://medium.com/@bob/b", "<html>b</html>")
+            self.assertEqual(count(), 0)
+            cache.put("https://medium.com/@bob/c", "<html>c</html>")
+            self.assertEqual(count(), 3)
+            cache.touch("https://medium.com/@bob/a")
+            cache.flush()
+            self.assertEqual(count(), 3)
+        finally:
+            reader.close()
+            cache.close()
+
+    def test_run_off_the_event_loop(self):
+        async def roundtrip():
+            await self.cache.run(self.cache.put, "https://medium.com/@bob/post-3", b"<html>x</html>", '"e"', None)
+            return await self.cache.run(self.cache.get, "https://medium.com/@bob/post-3")
+
+        page = asyncio.run(roundtrip())
+        self.assertEqual(page.content, b"<html>x</html>")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import base64
+import datetime
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestion"))
+
+from imap_digests import fetch_digests, find_html_parts, parse_fetch_response, DigestFetchError
+
+DIGEST_HTML = (
+    '<html><body><a href="https://medium.com/@bob/post-{n}?source=email-digest.reader">Post</a>'
+    '<a href="https://medium.com/me/settings?source=digest.reader">Settings</a></body></html>'
+)
+
+# multipart/alternative: text/plain (1), then base64 text/html (2)
+ALTERNATIVE = (
+    b'(("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 12 1 NIL NIL NIL)'
+    b'("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "BASE64" 240 4 NIL NIL NIL) "ALTERNATIVE" ("BOUNDARY" "b1") NIL NIL)'
+)
+
+
+class FakeIMAP:
+    """Answers UID SEARCH/FETCH like Gmail for three messages on two days."""
+
+    def __init__(self):
+        self.commands = []
+        self.messages = {
+            101: ("16-Nov-2025 06:10:00 +0000", b"Subject: Old digest\r\n\r\n"),
+            102: ("17-Nov-2025 05:00:00 +0000", b"Subject: Early digest\r\n\r\n"),
+            103: ("17-Nov-2025 07:12:03 +0000", b"Subject: Daily Digest\r\n\r\n"),
+        }
+
+    def select(self, mailbox):
+        pass
+
+    def uid(self, command, *args):
+        self.commands.append((command,) + args)
+        if command == "SEARCH":
+            return "OK", [b"101 102 103"]
+        uids, items = [int(u) for u in args[0].split(",")], args[1]
+        data = []
+        for seq, uid in enumerate(uids, 1):
+            internal_date, header = self.messages[uid]
+            if "BODYSTRUCTURE" in items:
+                prefix = (f'{seq} (UID {uid} INTERNALDATE "{internal_date}" BODYSTRUCTURE ').encode()
+                prefix += ALTERNATIVE + f" BODY[HEADER.FIELDS (SUBJECT DATE)] {{{len(header)}}}".encode()
+                data.extend([(prefix, header), b")"])
+            else:
+                body = base64.b64encode(DIGEST_HTML.format(n=uid).encode())
+                data.extend([(f"{seq} (UID {uid} BODY[2] {{{len(body)}}}".encode(), body), b")"])
+        return "OK", data
+
+
+class TestImapDigests(unittest.TestCase):
+    def test_find_html_parts(self):
+        structure = parse_fetch_response([b"1 (UID 7 BODYSTRUCTURE " + ALTERNATIVE + b")"])[7]["BODYSTRUCTURE"]
+        self.assertEqual(find_html_parts(structure), [("2", "BASE64", "utf-8")])
+
+    def test_single_part_html_is_section_1(self):
+        structure = ["TEXT", "HTML", ["CHARSET", "iso-8859-1"], None, None, "QUOTED-PRINTABLE", 10, 1]
+        self.assertEqual(find_html_parts(structure), [("1", "QUOTED-PRINTABLE", "iso-8859-1")])
+
+    def test_range_uses_one_search_and_two_fetches(self):
+        mail = FakeIMAP()
+        digests = fetch_digests(mail, datetime.date(2025, 11, 16), datetime.date(2025, 11, 17))
+
+        self.assertEqual([c[0] for c in mail.commands], ["SEARCH", "FETCH", "FETCH"])
+        self.assertIn('SINCE "16-Nov-2025" BEFORE "18-Nov-2025"', mail.commands[0][2])
+        # Only the latest message of each day has its HTML part downloaded, and only with PEEK
+        self.assertEqual(mail.commands[2][1:], ("101,103", "(BODY.PEEK[2])"))
+
+        self.assertEqual(sorted(digests), [datetime.date(2025, 11, 16), datetime.date(2025, 11, 17)])
+        digest = digests[datetime.date(2025, 11, 17)]
+        self.assertEqual(digest.subject, "Daily Digest")
+        self.assertEqual(digest.links(), ["https://medium.com/@bob/post-103?source=email-digest.reader"])
+
+    def test_empty_search(self):
+        mail = FakeIMAP()
+        mail.uid = lambda command, *args: ("OK", [b""])
+        self.assertEqual(fetch_digests(mail, datetime.date(2025, 11, 1), datetime.date(2025, 11, 2)), {})
+
+    def test_failed_header_fetch_raises(self):
+        mail = FakeIMAP()
+        search = mail.uid
+        mail.uid = lambda command, *args: search(command, *args) if command == "SEARCH" else ("NO", [b"throttled"])
+        with self.assertRaises(DigestFetchError):
+            fetch_digests(mail, datetime.date(2025, 11, 16), datetime.date(2025, 11, 17))
+
+    def test_failed_body_fetch_marks_the_digests(self):
+        mail = FakeIMAP()
+        answer = mail.uid
+        mail.uid = lambda command, *args: ("NO", [b"throttled"]) if len(mail.commands) == 2 else answer(command, *args)
+        digests = fetch_digests(mail, datetime.date(2025, 11, 16), datetime.date(2025, 11, 17))
+        self.assertEqual(sorted(digests), [datetime.date(2025, 11, 16), datetime.date(2025, 11, 17)])
+        for digest in digests.values():
+            self.assertEqual(digest.error, "body fetch failed: NO")
+            self.assertEqual(digest.links(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
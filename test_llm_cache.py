@@ -0,0 +1,89 @@
+import os
+import sys
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestion"))
+
+from llm_cache import LLMCache, make_key
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "llm_cache.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_covers_model_prompt_and_content(self):
+        key = make_key("ai/gemma3", "1", "Title", "Body")
+        self.assertEqual(key, make_key("ai/gemma3", "1", "Title", "Body"))
+        self.assertNotEqual(key, make_key("ai/llama3", "1", "Title", "Body"))
+        self.assertNotEqual(key, make_key("ai/gemma3", "2", "Title", "Body"))
+        self.assertNotEqual(key, make_key("ai/gemma3", "1", "Title", "Body!"))
+        # Parts are delimited, so shifting text between them changes the key
+        self.assertNotEqual(make_key("m", "1", "ab", "c"), make_key("m", "1", "a", "bc"))
+
+    def test_round_trip_and_persistence(self):
+        cache = LLMCache(self.path)
+        key = make_key("ai/gemma3", "1", "Title", "Body")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "ai/gemma3", "Un résumé.", ["AI", "Python"])
+        cache.close()
+
+        cache = LLMCache(self.path)
+        self.assertEqual(cache.get(key), ("Un résumé.", ["AI", "Python"]))
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        cache.close()
+
+    def test_size_based_eviction_drops_least_recently_used(self):
+        cache = LLMCache(self.path, max_bytes=600)
+        keys = [make_key("m", "1", str(i), "body") for i in range(3)]
+        for key in keys[:2]:
+            cache.put(key, "m", "x" * 150, ["Tag"])
+        # Reading the first entry makes the second one the eviction candidate
+        cache.get(keys[0])
+        cache.put(keys[2], "m", "x" * 150, ["Tag"])
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertLessEqual(cache.stats()["size_bytes"], 600)
+        cache.close()
+
+    def test_writes_are_committed_in_batches(self):
+        cache = LLMCache(self.path, commit_every=2, commit_seconds=3600)
+        reader = sqlite3.connect(self.path)
+        try:
+            count = lambda: reader.execute("SELECT COUNT(*) FROM llm_results").fetchone()[0]
+            cache.put(make_key("m", "1", "a", "c"), "m", "s", ["Tag"])
+            self.assertEqual(count(), 0)
+            cache.put(make_key("m", "1", "b", "c"), "m", "s", ["Tag"])
+            self.assertEqual(count(), 2)
+            cache.put(make_key("m", "1", "c", "c"), "m", "s", ["Tag"])
+            cache.flush()
+            self.assertEqual(count(), 3)
+        finally:
+            reader.close()
+            cache.close()
+
+    def test_run_off_the_event_loop(self):
+        cache = LLMCache(self.path)
+        key = make_key("m", "1", "t", "c")
+
+        async def roundtrip():
+            await cache.run(cache.put, key, "m", "Un résumé.", ["AI"])
+            return await cache.run(cache.get, key)
+
+        self.assertEqual(asyncio.run(roundtrip()), ("Un résumé.", ["AI"]))
+        cache.close()
+
+    def test_clear(self):
+        cache = LLMCache(self.path)
+        cache.put(make_key("m", "1", "t", "c"), "m", "s", ["Tag"])
+        self.assertEqual(cache.clear(), 1)
+        self.assertEqual(cache.stats()["entries"], 0)
+        cache.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import datetime
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from pagination import (encode_cursor, decode_cursor, keyset_condition, clamp_limit, split_page,
+                        encode_search_cursor, decode_search_cursor, split_search_page, MAX_PAGE_SIZE)
+
+class TestCursorPagination(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        token = encode_cursor(datetime.date(2025, 11, 21), 42)
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token), (datetime.date(2025, 11, 21), 42))
+
+    def test_cursor_round_trip_null_date(self):
+        self.assertEqual(decode_cursor(encode_cursor(None, 7)), (None, 7))
+
+    def test_invalid_cursor(self):
+        for token in ["not-a-cursor", encode_cursor("2025-11-21", 1)[:-3], ""]:
+            with self.assertRaises(ValueError):
+                decode_cursor(token)
+
+    def test_keyset_condition(self):
+        condition, params = keyset_condition((datetime.date(2025, 11, 21), 42))
+        self.assertEqual(condition, "(publication_date, id) < (%s, %s)")
+        self.assertEqual(params, [datetime.date(2025, 11, 21), 42])
+
+        condition, params = keyset_condition((None, 42))
+        self.assertIn("publication_date IS NULL AND id < %s", condition)
+        self.assertEqual(params, [42])
+
+    def test_clamp_limit(self):
+        self.assertEqual(clamp_limit(10), 10)
+        self.assertEqual(clamp_limit(10_000), MAX_PAGE_SIZE)
+
+    def test_split_page(self):
+        rows = [{"id": i, "publication_date": datetime.date(2025, 11, 21)} for i in range(5, 0, -1)]
+        page, next_cursor = split_page(rows, 4)
+        self.assertEqual([r["id"] for r in page], [5, 4, 3, 2])
+        self.assertEqual(decode_cursor(next_cursor), (datetime.date(2025, 11, 21), 2))
+
+        page, next_cursor = split_page(rows, 5)
+        self.assertEqual(len(page), 5)
+        self.assertIsNone(next_cursor)
+
+    def test_search_cursor_round_trip(self):
+        rank = 0.1 + 0.2
+        self.assertEqual(decode_search_cursor(encode_search_cursor(rank, 9)), (rank, 9))
+        with self.assertRaises(ValueError):
+            decode_search_cursor(encode_cursor("2025-11-21", 9))
+
+    def test_split_search_page(self):
+        rows = [{"id": i, "rank": i / 10} for i in range(3, 0, -1)]
+        page, next_cursor = split_search_page(rows, 2)
+        self.assertEqual([r["id"] for r in page], [3, 2])
+        self.assertEqual(decode_search_cursor(next_cursor), (0.2, 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import sys
+import gzip
+import datetime
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from cache import ResponseCache, CachedResponse, make_key
+from http_cache import make_etag, validator_headers, etag_matches, is_not_modified, not_modified_etag
+import compression
+from compression import negotiate_encoding, CompressionStats
+
+class TestResponseCache(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = ResponseCache(max_entries=4, ttl=60)
+        key = make_key("articles", date="2025-11-21")
+        self.assertIsNone(cache.get(key, 1))
+        cache.put(key, 1, CachedResponse(b"[]"))
+        self.assertEqual(cache.get(key, 1).body, b"[]")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_version_change_invalidates(self):
+        cache = ResponseCache(max_entries=4, ttl=60)
+        key = make_key("filters")
+        cache.put(key, 1, CachedResponse(b"{}"))
+        self.assertIsNone(cache.get(key, 2))
+        self.assertEqual(cache.stats()["invalidations"], 1)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(max_entries=4, ttl=0)
+        key = make_key("filters")
+        cache.put(key, 1, CachedResponse(b"{}"))
+        self.assertIsNone(cache.get(key, 1))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2, ttl=60)
+        for name in ["a", "b"]:
+            cache.put(make_key("articles", author=name), 1, CachedResponse(name.encode()))
+        # Touch "a" so "b" becomes the least recently used entry
+        cache.get(make_key("articles", author="a"), 1)
+        cache.put(make_key("articles", author="c"), 1, CachedResponse(b"c"))
+        self.assertIsNone(cache.get(make_key("articles", author="b"), 1))
+        self.assertIsNotNone(cache.get(make_key("articles", author="a"), 1))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_key_normalization(self):
+        self.assertEqual(
+            make_key("articles", tag=["Python", "AI"], date=None, author=""),
+            make_key("articles", tag=["AI", "Python", "AI"]),
+        )
+        self.assertNotEqual(make_key("articles", limit=10), make_key("articles", limit=20))
+
+class TestConditionalRequests(unittest.TestCase):
+    updated_at = datetime.datetime(2025, 11, 21, 8, 45, 12, 345000, tzinfo=datetime.timezone.utc)
+
+    def test_etag_depends_on_version_and_key(self):
+        key = make_key("articles", date="2025-11-21")
+        self.assertEqual(make_etag(3, key), make_etag(3, key))
+        self.assertNotEqual(make_etag(3, key), make_etag(4, key))
+        self.assertNotEqual(make_etag(3, key), make_etag(3, make_key("filters")))
+
+    def test_validator_headers(self):
+        headers = validator_headers(3, self.updated_at, make_key("filters"))
+        self.assertEqual(headers["Last-Modified"], "Fri, 21 Nov 2025 08:45:12 GMT")
+        self.assertIn("must-revalidate", headers["Cache-Control"])
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"v3-abc"', '"v3-abc"'))
+        self.assertTrue(etag_matches('"v2-abc", W/"v3-abc"', '"v3-abc"'))
+        self.assertTrue(etag_matches("*", '"v3-abc"'))
+        self.assertFalse(etag_matches('"v2-abc"', '"v3-abc"'))
+
+    def test_if_modified_since(self):
+        headers = {"if-modified-since": "Fri, 21 Nov 2025 08:45:12 GMT"}
+        self.assertTrue(is_not_modified(headers, '"v3-abc"', self.updated_at))
+        headers = {"if-modified-since": "Fri, 21 Nov 2025 08:45:11 GMT"}
+        self.assertFalse(is_not_modified(headers, '"v3-abc"', self.updated_at))
+
+    def test_if_none_match_takes_precedence(self):
+        headers = {"if-none-match": '"v2-abc"', "if-modified-since": "Fri, 21 Nov 2025 09:00:00 GMT"}
+        self.assertFalse(is_not_modified(headers, '"v3-abc"', self.updated_at))
+
+class TestCompression(unittest.TestCase):
+    def test_negotiate_encoding(self):
+        preferred = "br" if compression.HAS_BROTLI else "gzip"
+        self.assertEqual(negotiate_encoding("gzip, deflate, br"), preferred)
+        self.assertEqual(negotiate_encoding("br;q=0.5, gzip"), "gzip")
+        self.assertEqual(negotiate_encoding("gzip;q=0, br;q=0"), None)
+        self.assertEqual(negotiate_encoding("*"), preferred)
+        self.assertIsNone(negotiate_encoding("identity"))
+        self.assertIsNone(negotiate_encoding(None))
+
+    def test_compressed_once_per_entry(self):
+        response = CachedResponse(b'[{"title":"same"}]' * 200)
+        body, encoding, reused = response.encoded("gzip")
+        self.assertEqual((encoding, reused), ("gzip", False))
+        self.assertEqual(gzip.decompress(body), response.body)
+        again = response.encoded("gzip")
+        self.assertIs(again[0], body)
+        self.assertTrue(again[2])
+
+    def test_small_bodies_are_sent_as_is(self):
+        response = CachedResponse(b"[]")
+        self.assertEqual(response.encoded("gzip"), (b"[]", None, False))
+        self.assertEqual(response.encoded(None), (b"[]", None, False))
+
+    def test_each_encoding_has_its_own_etag(self):
+        key = make_key("filters")
+        self.assertNotEqual(make_etag(3, key, "gzip"), make_etag(3, key))
+        self.assertNotEqual(make_etag(3, key, "gzip"), make_etag(3, key, "br"))
+        self.assertEqual(validator_headers(3, None, key, "gzip")["Vary"], "Accept-Encoding")
+
+    def test_identity_copy_revalidates_whatever_the_client_accepts(self):
+        key = make_key("filters")
+        identity, gzipped = make_etag(3, key), make_etag(3, key, "gzip")
+        # A small body was sent as is, under the identity ETag
+        self.assertEqual(not_modified_etag({"if-none-match": identity}, 3, key, "gzip", None), identity)
+        self.assertEqual(not_modified_etag({"if-none-match": gzipped}, 3, key, "gzip", None), gzipped)
+        self.assertIsNone(not_modified_etag({"if-none-match": gzipped}, 3, key, None, None))
+        self.assertIsNone(not_modified_etag({"if-none-match": make_etag(3, key, "br")}, 3, key, "gzip", None))
+
+    def test_bytes_saved(self):
+        stats = CompressionStats()
+        stats.record("gzip", 1000, 200, reused=False)
+        stats.record("gzip", 1000, 200, reused=True)
+        stats.record(None, 50, 50, reused=False)
+        result = stats.stats()
+        self.assertEqual(result["bytes_saved"], 1600)
+        self.assertEqual((result["compressions"], result["reused"]), (1, 1))
+        self.assertEqual(result["compressed"], {"gzip": 2})
+
+if __name__ == "__main__":
+    unittest.main()
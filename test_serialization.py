@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import datetime
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from fastapi.encoders import jsonable_encoder
+
+import serialization
+from models import Article, ArticleCard, ArticleFields
+from queries import ARTICLE_FIELDS, VIEWS, resolve_fields, select_columns, build_articles_query
+from serialization import render_articles
+
+ROWS = [
+    {"id": 2, "title": "Données & « IA »", "url": "https://medium.com/@a/post-2", "author": "Zoë",
+     "publication_date": datetime.date(2025, 11, 21), "image_url": None, "summary": "Résumé\n\"cité\"",
+     "tags": ["AI", "Data"], "reading_time": "5 min read"},
+    {"id": 1, "title": "No date", "url": "https://medium.com/@b/post-1", "author": None,
+     "publication_date": None, "image_url": "", "summary": None, "tags": [], "reading_time": None,
+     "rank": 0.25},
+]
+
+def validated_json(rows):
+    """The previous path: validate every row through the model, then encode."""
+    payload = jsonable_encoder([Article(**row) for row in rows])
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class TestSerialization(unittest.TestCase):
+    def test_fields_follow_the_model(self):
+        self.assertEqual(ARTICLE_FIELDS, list(Article.model_fields))
+
+    def test_same_bytes_as_the_validated_path(self):
+        self.assertEqual(render_articles(ROWS), validated_json(ROWS))
+
+    def test_stdlib_fallback_matches(self):
+        has_orjson = serialization.HAS_ORJSON
+        serialization.HAS_ORJSON = False
+        try:
+            self.assertEqual(render_articles(ROWS), validated_json(ROWS))
+        finally:
+            serialization.HAS_ORJSON = has_orjson
+
+    def test_null_tags_become_an_empty_list(self):
+        row = dict(ROWS[0], tags=None)
+        self.assertEqual(json.loads(render_articles([row]))[0]["tags"], [])
+
+class TestFieldSelection(unittest.TestCase):
+    def test_card_view_follows_its_model(self):
+        self.assertEqual(VIEWS["card"], list(ArticleCard.model_fields))
+        self.assertEqual(render_articles(ROWS, VIEWS["card"]),
+                         json.dumps(jsonable_encoder([ArticleCard(**row) for row in ROWS]),
+                                    ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def test_projection_model_covers_every_field(self):
+        self.assertEqual(list(ArticleFields.model_fields), ARTICLE_FIELDS)
+        self.assertFalse(any(field.is_required() for field in ArticleFields.model_fields.values()))
+
+    def test_resolve_fields(self):
+        self.assertEqual(resolve_fields(), ARTICLE_FIELDS)
+        self.assertEqual(resolve_fields(view="card"), VIEWS["card"])
+        # Schema order, whatever the order asked for
+        self.assertEqual(resolve_fields(fields="tags, title,id"), ["id", "title", "tags"])
+        for fields, view in [("title,created_at", None), (" , ", None), (None, "tiny"), ("id", "card")]:
+            with self.assertRaises(ValueError):
+                resolve_fields(fields, view)
+
+    def test_sql_reads_requested_and_keyset_columns(self):
+        self.assertEqual(select_columns(["title", "tags"]), "id, title, publication_date, tags")
+        query, _ = build_articles_query(tag="AI", fields=["title"])
+        self.assertTrue(query.startswith("SELECT id, title, publication_date FROM articles"))
+
+    def test_payload_has_only_requested_fields(self):
+        self.assertEqual(json.loads(render_articles(ROWS, ["id", "title"])),
+                         [{"id": 2, "title": "Données & « IA »"}, {"id": 1, "title": "No date"}])
+
+if __name__ == '__main__':
+    unittest.main()
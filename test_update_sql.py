@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingestion"))
+
+from update_sql import update_statements, write_sql_update
+
+ARTICLE = {
+    "title": "It's fast",
+    "url": "https://medium.com/@bob/post-1",
+    "author": "Bob",
+    "publication_date": "2025-11-21",
+    "image_url": None,
+    "summary": "Résumé",
+    "tags": ["Python", 'say "hi"'],
+    "reading_time": "5 min read",
+}
+
+class TestUpdateSQL(unittest.TestCase):
+    def test_diff_mode_guards_upserts_and_deletes_missing(self):
+        statements = list(update_statements([ARTICLE], "2025-11-21", diff=True))
+        self.assertIn("IS DISTINCT FROM", statements[0])
+        self.assertIn("'It''s fast'", statements[0])
+        self.assertIn('\'{"Python","say \\"hi\\""}\'', statements[0])
+        self.assertEqual(
+            statements[-1],
+            "DELETE FROM articles WHERE publication_date = '2025-11-21' AND url NOT IN ('https://medium.com/@bob/post-1');\n",
+        )
+
+    def test_full_mode_replaces_the_day(self):
+        statements = list(update_statements([ARTICLE], "2025-11-21", diff=False))
+        self.assertEqual(statements[0], "DELETE FROM articles WHERE publication_date = '2025-11-21';\n")
+        self.assertEqual(len(statements), 2)
+        self.assertNotIn("IS DISTINCT FROM", statements[1])
+
+    def test_empty_day_in_diff_mode_clears_it(self):
+        self.assertEqual(
+            list(update_statements([], "2025-11-21", diff=True)),
+            ["DELETE FROM articles WHERE publication_date = '2025-11-21';\n"],
+        )
+
+    def test_written_through_a_temporary_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "medium-2025-11-21.sql")
+            write_sql_update(path, [ARTICLE], "2025-11-21")
+            self.assertEqual(os.listdir(tmp), ["medium-2025-11-21.sql"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+import os
+import sys
+import csv
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dbupdater"))
+
+import updater
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+# Opt-in: the COPY merge test runs inside a transaction that is always rolled back
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+COLUMNS = ["title", "url", "author", "publication_date", "image_url", "summary", "tags", "reading_time"]
+DAY = "2031-01-01"
+
+
+def manifest(**overrides):
+    data = {"format": "csv", "date": DAY, "rows": 2, "columns": COLUMNS, "data": f"medium-{DAY}.csv"}
+    data.update(overrides)
+    return data
+
+
+def row(url, title):
+    return [title, url, "Bob", DAY, "", "Un résumé", '{"AI","Python"}', "5 min read"]
+
+
+class UpdatesDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(updater, "UPDATES_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_copy_update(self, lines, day=DAY, **overrides):
+        data_name = f"medium-{day}.csv"
+        with open(os.path.join(self.tmp.name, data_name), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(COLUMNS)
+            writer.writerows(lines)
+        name = f"medium-{day}{updater.MANIFEST_SUFFIX}"
+        with open(os.path.join(self.tmp.name, name), "w") as f:
+            json.dump(manifest(**{"date": day, "rows": len(lines), "data": data_name, **overrides}), f)
+        return name
+
+
+class TestManifest(UpdatesDirTestCase):
+    def test_valid_manifest_keeps_the_file_column_order(self):
+        columns = ["url", "title", "tags"]
+        self.assertEqual(updater.validate_manifest(manifest(columns=columns)), columns)
+
+    def test_invalid_manifests(self):
+        for bad in (
+            manifest(format="parquet"),
+            {key: value for key, value in manifest().items() if key != "rows"},
+            manifest(columns=COLUMNS + ["id"]),
+            manifest(columns=["title", "url", "title"]),
+            manifest(columns=["title", "author"]),
+        ):
+            with self.assertRaises(ValueError):
+                updater.validate_manifest(bad)
+
+    def test_data_file_is_looked_up_next_to_the_manifest(self):
+        path = updater.data_path(manifest(data="../../etc/medium.csv"))
+        self.assertEqual(path, os.path.join(self.tmp.name, "medium.csv"))
+
+    def test_row_count_must_match(self):
+        updater.check_row_count(manifest(rows=2), 2)
+        with self.assertRaises(ValueError):
+            updater.check_row_count(manifest(rows=2), 1)
+
+    def test_update_files_include_the_csv(self):
+        name = self.write_copy_update([row("https://medium.com/@bob/a", "A")])
+        self.assertEqual(updater.update_files(name), [name, f"medium-{DAY}.csv"])
+        self.assertEqual(updater.update_files("medium-2031-01-02.sql"), ["medium-2031-01-02.sql"])
+
+
+class TestOrdering(UpdatesDirTestCase):
+    def touch(self, name, mtime):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write("SELECT 1;")
+        os.utime(path, (mtime, mtime))
+
+    def test_days_in_order_and_newest_run_of_a_day_last(self):
+        # 2031-01-01 00:00 UTC
+        midnight = 1924992000
+        self.touch("manual-fix.sql", midnight - 3600)
+        self.touch("medium-2031-01-02.sql", midnight)
+        self.touch("medium-2031-01-01.sql", midnight + 60)
+        # The manifest's generated_at counts, not its mtime
+        name = self.write_copy_update([row("https://medium.com/@bob/a", "A")], generated_at="2031-01-01T00:02:00+00:00")
+        os.utime(os.path.join(self.tmp.name, name), (midnight - 7200, midnight - 7200))
+
+        self.assertEqual(sorted(updater.list_updates(), key=updater.update_sort_key), [
+            "medium-2031-01-01.sql",
+            name,
+            "medium-2031-01-02.sql",
+            "manual-fix.sql",
+        ])
+
+    def test_manifest_date_wins_over_the_name(self):
+        name = self.write_copy_update([row("https://medium.com/@bob/a", "A")])
+        os.rename(os.path.join(self.tmp.name, name), os.path.join(self.tmp.name, "renamed" + updater.MANIFEST_SUFFIX))
+        self.assertEqual(updater.update_target("renamed" + updater.MANIFEST_SUFFIX)[0], DAY)
+
+
+class FakeCursor:
+    """Answers the applied_updates lookups from a list of (file_name, target_date, content_hash)."""
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.row = None
+
+    def execute(self, query, params):
+        if query == updater.LAST_APPLIED_FOR_DATE:
+            matches = [h for _, day, h in self.ledger if day == params[0]]
+        else:
+            matches = [h for name, day, h in self.ledger if day is None and name == params[0]]
+        self.row = (matches[-1],) if matches else None
+
+    def fetchone(self):
+        return self.row
+
+
+class TestLedger(UpdatesDirTestCase):
+    def rewrite(self, name, **changes):
+        path = os.path.join(self.tmp.name, name)
+        data = updater.read_manifest(path)
+        data.update(changes)
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    def test_hash_covers_the_csv_and_the_manifest(self):
+        name = self.write_copy_update([row("https://medium.com/@bob/a", "A")], generated_at="2031-01-01T08:00:00+00:00")
+        first = updater.content_hash(name)
+
+        # A rerun that produced the same articles hashes the same
+        self.rewrite(name, generated_at="2031-01-02T08:00:00+00:00")
+        self.assertEqual(updater.content_hash(name), first)
+
+        self.rewrite(name, date="2031-01-02")
+        self.assertNotEqual(updater.content_hash(name), first)
+        self.rewrite(name, date=DAY, columns=list(reversed(COLUMNS)))
+        self.assertNotEqual(updater.content_hash(name), first)
+        self.rewrite(name, columns=COLUMNS)
+        self.assertEqual(updater.content_hash(name), first)
+
+        self.write_copy_update([row("https://medium.com/@bob/a", "A, edited")])
+        self.assertNotEqual(updater.content_hash(name), first)
+
+    def test_unchanged_compares_with_the_last_update_of_the_day(self):
+        cursor = FakeCursor([("medium-2031-01-01.sql", DAY, "old"), ("medium-2031-01-01.manifest.json", DAY, "new")])
+        self.assertTrue(updater.is_unchanged(cursor, "medium-2031-01-01.sql", DAY, "new"))
+        # Content applied before but replaced since is applied again
+        self.assertFalse(updater.is_unchanged(cursor, "medium-2031-01-01.sql", DAY, "old"))
+        self.assertFalse(updater.is_unchanged(cursor, "medium-2031-01-02.sql", "2031-01-02", "new"))
+
+    def test_undated_files_compare_by_name(self):
+        cursor = FakeCursor([("manual-fix.sql", None, "h")])
+        self.assertTrue(updater.is_unchanged(cursor, "manual-fix.sql", None, "h"))
+        self.assertFalse(updater.is_unchanged(cursor, "other-fix.sql", None, "h"))
+
+
+@unittest.skipUnless(psycopg2 and TEST_DATABASE_URL, "set TEST_DATABASE_URL to run the COPY merge against Postgres")
+class TestCopyMerge(UpdatesDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conn = psycopg2.connect(TEST_DATABASE_URL)
+        self.addCleanup(self.conn.close)
+        self.addCleanup(self.conn.rollback)
+        self.cursor = self.conn.cursor()
+        for url, title in (("https://medium.com/@bob/a", "Old A"), ("https://medium.com/@bob/b", "B")):
+            self.cursor.execute(
+                "INSERT INTO articles (title, url, author, publication_date, tags) VALUES (%s, %s, 'Bob', %s, '{}')",
+                (title, url, DAY),
+            )
+
+    def day_articles(self):
+        self.cursor.execute("SELECT url, title, tags FROM articles WHERE publication_date = %s ORDER BY url", (DAY,))
+        return self.cursor.fetchall()
+
+    def apply(self, rows, diff):
+        name = self.write_copy_update(rows)
+        with mock.patch.object(updater, "UPDATER_DIFF_MODE", diff):
+            return updater.apply_copy_update(self.cursor, os.path.join(self.tmp.name, name))
+
+    def test_merge_replaces_the_day(self):
+        for diff in (True, False):
+            with self.subTest(diff=diff):
+                loaded = self.apply([
+                    row("https://medium.com/@bob/a", "New A"),
+                    row("https://medium.com/@bob/c", "First C"),
+                    # The last line of a URL wins
+                    row("https://medium.com/@bob/c", "C"),
+                ], diff)
+                self.assertEqual(loaded, 3)
+                self.assertEqual(self.day_articles(), [
+                    ("https://medium.com/@bob/a", "New A", ["AI", "Python"]),
+                    ("https://medium.com/@bob/c", "C", ["AI", "Python"]),
+                ])
+
+    def test_diff_mode_leaves_unchanged_rows_alone(self):
+        self.apply([row("https://medium.com/@bob/a", "A")], True)
+        self.cursor.execute("SELECT xmin FROM articles WHERE url = 'https://medium.com/@bob/a'")
+        before = self.cursor.fetchone()
+        self.cursor.execute("SAVEPOINT again")
+        self.apply([row("https://medium.com/@bob/a", "A")], True)
+        self.cursor.execute("SELECT xmin FROM articles WHERE url = 'https://medium.com/@bob/a'")
+        # Not rewritten: a rewritten row would carry the savepoint's subtransaction id
+        self.assertEqual(self.cursor.fetchone(), before)
+
+    def test_row_count_mismatch_fails(self):
+        name = self.write_copy_update([row("https://medium.com/@bob/a", "A")], rows=5)
+        with self.assertRaises(ValueError):
+            updater.apply_copy_update(self.cursor, os.path.join(self.tmp.name, name))
+
+
+if __name__ == "__main__":
+    unittest.main()
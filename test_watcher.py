@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dbupdater"))
+
+import watcher
+from watcher import UpdateWatcher
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances the clock and runs the events now due."""
+
+    def __init__(self, events=()):
+        self.now = 0.0
+        self.events = sorted(events)
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        while self.events and self.events[0][0] <= self.now:
+            self.events.pop(0)[1]()
+
+
+class TestPollingDebounce(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name, value in (("UPDATER_POLL_INTERVAL", 1), ("UPDATER_DEBOUNCE", 2),
+                            ("UPDATER_DEBOUNCE_MAX", 30), ("UPDATER_RESCAN_INTERVAL", 300)):
+            patcher = mock.patch.object(watcher, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.watcher = UpdateWatcher(self.tmp.name, lambda name: name.endswith(".sql"), mode="poll")
+
+    def write(self, name):
+        return lambda: open(os.path.join(self.tmp.name, name), "w").close()
+
+    def wait(self, clock):
+        with mock.patch.object(watcher, "time", clock):
+            return self.watcher.wait()
+
+    def test_burst_is_collapsed_into_one_sweep(self):
+        clock = FakeClock([(t, self.write(f"medium-2031-01-0{t}.sql")) for t in range(1, 6)])
+        self.assertTrue(self.wait(clock))
+        # Returned once the directory stayed quiet for UPDATER_DEBOUNCE, with the whole burst seen
+        self.assertEqual(len(self.watcher._snapshot), 5)
+        self.assertLess(clock.now, 5 + 2 * 2 + 1)
+        self.assertEqual(clock.events, [])
+
+    def test_other_files_do_not_wake_it(self):
+        clock = FakeClock([(1, self.write("medium-2031-01-01.csv.tmp"))])
+        self.assertFalse(self.wait(clock))
+        self.assertGreaterEqual(clock.now, 300)
+
+    def test_endless_stream_is_cut_at_debounce_max(self):
+        clock = FakeClock([(t, self.write(f"medium-{t}.sql")) for t in range(1, 100)])
+        self.assertTrue(self.wait(clock))
+        self.assertLessEqual(clock.now, 1 + 30 + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()